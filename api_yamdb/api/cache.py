@@ -0,0 +1,222 @@
+from hashlib import md5
+from math import ceil
+from time import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from api.metrics import RESPONSE_CACHE
+from api.replicas import may_lag
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import data_loaded
+
+User = get_user_model()
+
+CACHED_MODELS = (Category, Genre, Title, Review, Comment, User)
+
+# Поля, по значению которых у модели ведутся отдельные версии данных:
+# запись отзыва к одному произведению не меняет ETag отзывов к другим.
+SCOPE_FIELDS = {
+    Review: ('title_id',),
+    Comment: ('review_id',),
+}
+
+# Область «все значения»: её версия меняется при сбросе модели целиком.
+ALL_SCOPES = '*'
+
+
+# Заголовки, которые ставятся заново при каждом ответе из кэша.
+CONDITIONAL_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_generation_cache():
+    return caches[settings.API_GENERATIONS_CACHE_ALIAS]
+
+
+def generation_key(model, scope=None):
+    key = f'generation:{model._meta.label_lower}'
+    return key if scope is None else f'{key}:{scope}'
+
+
+def dependency_keys(dependency, kwargs):
+    """Ключи версий зависимости представления.
+
+    Зависимость — модель или пара (модель, поле): тогда версия берётся
+    только для значения поля из адреса запроса, например отзывов
+    к одному произведению.
+    """
+    if not isinstance(dependency, tuple):
+        return [generation_key(dependency)]
+    model, field = dependency
+    value = model._meta.get_field(field).to_python(kwargs[field])
+    return [
+        generation_key(model, ALL_SCOPES),
+        generation_key(model, f'{field}={value}'),
+    ]
+
+
+def instance_keys(instance):
+    """Ключи версий, которые меняет запись объекта."""
+    model = type(instance)
+    return [generation_key(model)] + [
+        generation_key(model, f'{field}={getattr(instance, field)}')
+        for field in SCOPE_FIELDS.get(model, ())
+    ]
+
+
+def new_generation():
+    """Новая версия данных: время изменения и случайная метка."""
+    return f'{time():.6f}:{uuid4().hex}'
+
+
+def get_generations(keys):
+    """Верни текущие версии данных по ключам, заводя недостающие."""
+    cache = get_generation_cache()
+    generations = cache.get_many(keys)
+    missing = {
+        key: new_generation() for key in keys if key not in generations
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def invalidate_keys(keys):
+    get_generation_cache().set_many(
+        {key: new_generation() for key in keys}, timeout=None
+    )
+
+
+def invalidate(*models):
+    """Смени версии моделей целиком: закэшированные ответы устареют."""
+    invalidate_keys([
+        key for model in models
+        for key in (generation_key(model), generation_key(model, ALL_SCOPES))
+    ])
+
+
+def get_signature(request, dependencies, kwargs):
+    """Верни хэш представления и время последнего изменения его данных.
+
+    Хэш зависит от адреса с хостом и схемой (в ответах есть абсолютные
+    ссылки next и previous), параметров запроса, формата ответа и версий
+    зависимостей, поэтому считается без обращений к базе.
+    """
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+    )
+    generations = get_generations([
+        key for dependency in dependencies
+        for key in dependency_keys(dependency, kwargs)
+    ])
+    raw = '|'.join((
+        request.build_absolute_uri(request.path),
+        repr(params),
+        request.accepted_media_type,
+        *generations,
+    ))
+    modified = max(
+        (float(generation.split(':')[0]) for generation in generations),
+        default=None
+    )
+    return md5(raw.encode()).hexdigest(), modified
+
+
+def http_last_modified(modified):
+    """Время для Last-Modified или None, пока идёт секунда изменения.
+
+    Last-Modified точен до секунды: выданный раньше конца секунды, он
+    совпал бы со временем следующей записи в ту же секунду, и запрос
+    с If-Modified-Since получил бы устаревший 304. До конца секунды
+    ответ проверяется только по ETag.
+    """
+    if modified is None or time() < ceil(modified):
+        return None
+    return ceil(modified)
+
+
+def get_cached_response(view, handler, request, *args, **kwargs):
+    """Отдай 304, ответ из кэша или получи его у handler и сохрани."""
+    if request.accepted_renderer.format != 'json':
+        return handler(request, *args, **kwargs)
+    digest, modified = get_signature(
+        request, view.cache_dependencies, view.kwargs
+    )
+    last_modified = http_last_modified(modified)
+    etag = quote_etag(digest)
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    route = request.resolver_match.view_name
+    if not_modified is not None:
+        RESPONSE_CACHE.inc(route=route, result='not_modified')
+        return not_modified
+
+    cache = get_cache()
+    key = f'body:{digest}'
+    cached = cache.get(key)
+    if cached is not None:
+        RESPONSE_CACHE.inc(route=route, result='hit')
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers:
+            response[header] = value
+    else:
+        RESPONSE_CACHE.inc(route=route, result='miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if modified is not None and may_lag(modified):
+            # Реплика могла ещё не получить последнюю запись: такой ответ
+            # не кэшируется и не помечается версией данных.
+            return response
+        response.add_post_render_callback(
+            lambda rendered: cache.set(key, (
+                rendered.content,
+                [(header, value) for header, value in rendered.items()
+                 if header not in CONDITIONAL_HEADERS],
+            ))
+        )
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def invalidate_model(sender, instance, **kwargs):
+    keys = instance_keys(instance)
+    transaction.on_commit(lambda: invalidate_keys(keys))
+
+
+# Приёмники привязаны к конкретным моделям: глобальный post_delete
+# отключил бы быстрое удаление (fast delete) для всех остальных.
+for cached_model in CACHED_MODELS:
+    post_save.connect(invalidate_model, sender=cached_model)
+    post_delete.connect(invalidate_model, sender=cached_model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate(Title))
+
+
+@receiver(data_loaded)
+@receiver(post_migrate)
+def invalidate_all(sender, **kwargs):
+    invalidate(*CACHED_MODELS)
@@ -1,18 +1,48 @@
 import django_filters
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
 
 
 class TitleFilter(django_filters.FilterSet):
-    category = django_filters.CharFilter(
+    category = CharInFilter(method='filter_category')
+    genre = CharInFilter(method='filter_genre')
+    category_contains = django_filters.CharFilter(
         field_name='category__slug', lookup_expr='icontains'
     )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug', lookup_expr='icontains'
+    genre_contains = django_filters.CharFilter(
+        field_name='genre__slug', lookup_expr='icontains', distinct=True
     )
-    name = django_filters.CharFilter(lookup_expr='icontains')
+    name = django_filters.CharFilter(method='filter_search')
+    search = django_filters.CharFilter(method='filter_search')
     filter = django_filters.NumberFilter(lookup_expr='iexect')
 
     class Meta:
         model = Title
         fields = ['category', 'genre', 'name', 'year']
+
+    def filter_category(self, queryset, name, slugs):
+        category_ids = list(
+            Category.objects.filter(slug__in=slugs).values_list(
+                'id', flat=True
+            )
+        )
+        return queryset.filter(category_id__in=category_ids)
+
+    def filter_genre(self, queryset, name, slugs):
+        genre_ids = list(
+            Genre.objects.filter(slug__in=slugs).values_list('id', flat=True)
+        )
+        return queryset.filter(
+            id__in=Title.genre.through.objects.filter(
+                genre_id__in=genre_ids
+            ).values('title_id')
+        )
+
+    def filter_search(self, queryset, name, value):
+        if name == 'name':
+            return queryset.search(value, fields=('name',))
+        return queryset.search(value)
@@ -0,0 +1,356 @@
+"""Сценарии замера: какие запросы к API выполнять и с какими данными."""
+from collections import namedtuple
+from functools import partial
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.urls import URLPattern, URLResolver
+
+from api.urls import urlpatterns
+from reviews.constants import MIN_RATE
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.constsnts import ADMIN, USER
+
+User = get_user_model()
+
+BENCH_CONFIRMATION_CODE = '1234'
+
+Scenario = namedtuple(
+    'Scenario',
+    ('name', 'method', 'route', 'kwargs', 'params', 'role', 'data',
+     'prepare'),
+    defaults=(None, None, None, None, None)
+)
+Scenario.__doc__ = """Запрос к маршруту `route` от пользователя с ролью `role`.
+
+`prepare()` вызывается перед каждым повтором вне замера
+и возвращает поля, которые нужно заменить: например, новые `kwargs`
+для удаления только что созданного объекта.
+"""
+
+
+def iter_routes(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def get_route_methods():
+    """Верни пары (имя маршрута, метод) для всех маршрутов api/urls.py."""
+    pairs = set()
+    for pattern in iter_routes(urlpatterns):
+        callback = pattern.callback
+        actions = getattr(callback, 'actions', None)
+        view_class = getattr(callback, 'cls', None) or getattr(
+            callback, 'view_class', None
+        )
+        if view_class is None:
+            continue
+        # Действие viewset может сузить список методов своего маршрута.
+        allowed = getattr(callback, 'initkwargs', {}).get(
+            'http_method_names', view_class.http_method_names
+        )
+        if actions is not None:
+            methods = actions
+        else:
+            methods = [
+                method for method in allowed if hasattr(view_class, method)
+            ]
+        pairs.update(
+            (pattern.name, method.upper()) for method in methods
+            if method in allowed and method not in ('head', 'options')
+        )
+    return pairs
+
+
+def get_bench_users():
+    """Заведи администратора и пользователя, от чьих имён идут запросы."""
+    users = {}
+    for role in (ADMIN, USER):
+        users[role], _ = User.objects.update_or_create(
+            username=f'bench_{role}',
+            defaults={
+                'email': f'bench_{role}@yamdb.fake',
+                'role': role,
+                'confirmation_code': BENCH_CONFIRMATION_CODE,
+            }
+        )
+    return users
+
+
+def get_targets():
+    """Выбери самые нагруженные объекты: популярное произведение,
+    отзыв с наибольшим числом комментариев и т. д.
+
+    Возвращает None, если в базе нет данных для замера.
+    """
+    title = Title.objects.select_related('category').order_by(
+        '-score_count', 'id'
+    ).first()
+    if title is None:
+        return None
+    review = Review.objects.filter(title=title).annotate(
+        comment_count=Count('comments')
+    ).order_by('-comment_count', 'id').first()
+    if review is None:
+        return None
+    comment = Comment.objects.filter(review=review).order_by('id').first()
+    if comment is None:
+        return None
+    return {
+        'title': title,
+        'review': review,
+        'comment': comment,
+        'genre': title.genre.order_by('id').first(),
+        'user': User.objects.exclude(
+            username__startswith='bench_'
+        ).order_by('id').first(),
+        'word': title.name.split()[0],
+    }
+
+
+def get_read_scenarios(targets):
+    title, review, comment = (
+        targets['title'], targets['review'], targets['comment']
+    )
+    title_kwargs = {'title_id': title.id}
+    review_kwargs = {**title_kwargs, 'review_id': review.id}
+    return [
+        Scenario('root', 'GET', 'api-root'),
+        Scenario('categories', 'GET', 'category-list'),
+        Scenario(
+            'categories-search', 'GET', 'category-list',
+            params={'search': title.category.name}
+        ),
+        Scenario('genres', 'GET', 'genre-list'),
+        Scenario('titles', 'GET', 'title-list'),
+        Scenario(
+            'titles-by-genre', 'GET', 'title-list',
+            params={'genre': targets['genre'].slug}
+        ),
+        Scenario(
+            'titles-by-category', 'GET', 'title-list',
+            params={'category': title.category.slug}
+        ),
+        Scenario(
+            'titles-by-year', 'GET', 'title-list',
+            params={'year': title.year}
+        ),
+        Scenario(
+            'titles-by-name', 'GET', 'title-list',
+            params={'name': targets['word']}
+        ),
+        Scenario(
+            'titles-search', 'GET', 'title-list',
+            params={'search': targets['word']}
+        ),
+        Scenario('title', 'GET', 'title-detail', {'pk': title.id}),
+        Scenario('reviews', 'GET', 'review-list', title_kwargs),
+        Scenario(
+            'reviews-cursor', 'GET', 'review-list', title_kwargs,
+            params={'cursor': ''}
+        ),
+        Scenario(
+            'review', 'GET', 'review-detail',
+            {**title_kwargs, 'pk': review.id}
+        ),
+        Scenario('comments', 'GET', 'comment-list', review_kwargs),
+        Scenario(
+            'comments-cursor', 'GET', 'comment-list', review_kwargs,
+            params={'cursor': ''}
+        ),
+        Scenario(
+            'comment', 'GET', 'comment-detail',
+            {**review_kwargs, 'pk': comment.id}
+        ),
+        Scenario('users', 'GET', 'user-list', role=ADMIN),
+        Scenario(
+            'users-search', 'GET', 'user-list', role=ADMIN,
+            params={'search': targets['user'].username}
+        ),
+        Scenario(
+            'user', 'GET', 'user-detail',
+            {'username': targets['user'].username}, role=ADMIN
+        ),
+        Scenario('me', 'GET', 'user-get-user-info', role=USER),
+    ]
+
+
+_numbers = count()
+
+
+def unique(prefix):
+    return f'bench-{prefix}-{next(_numbers)}'
+
+
+def new_slug_object(model):
+    slug = unique(model._meta.model_name)
+    model.objects.create(name=slug, slug=slug)
+    return {'kwargs': {'slug': slug}}
+
+
+def slug_object_data(model):
+    slug = unique(model._meta.model_name)
+    return {'data': {'name': slug, 'slug': slug}}
+
+
+def new_title(template):
+    created = Title.objects.create(
+        name=unique('title'), year=template.year, category=template.category
+    )
+    return {'kwargs': {'pk': created.id}}
+
+
+def title_data(template, genre):
+    return {'data': {
+        'name': unique('title'),
+        'year': template.year,
+        'genre': [genre.slug],
+        'category': template.category.slug,
+    }}
+
+
+def drop_review(title, author):
+    Review.objects.filter(title=title, author=author).delete()
+    return {}
+
+
+def own_review(title, author):
+    Review.objects.get_or_create(
+        title=title, author=author,
+        defaults={'text': 'bench', 'score': MIN_RATE}
+    )
+    return {}
+
+
+def new_review(title, author):
+    drop_review(title, author)
+    created = Review.objects.create(
+        title=title, author=author, text='bench', score=MIN_RATE
+    )
+    return {'kwargs': {'title_id': title.id, 'pk': created.id}}
+
+
+def new_comment(review, author):
+    created = Comment.objects.create(
+        review=review, author=author, text='bench'
+    )
+    return {'kwargs': {
+        'title_id': review.title_id, 'review_id': review.id, 'pk': created.id
+    }}
+
+
+def new_user():
+    username = unique('user')
+    User.objects.create(username=username, email=f'{username}@yamdb.fake')
+    return {'kwargs': {'username': username}}
+
+
+def user_data():
+    username = unique('user')
+    return {
+        'data': {'username': username, 'email': f'{username}@yamdb.fake'}
+    }
+
+
+def get_write_scenarios(targets, users):
+    """Пишущие сценарии: каждый повтор работает со своим объектом."""
+    title, review, comment = (
+        targets['title'], targets['review'], targets['comment']
+    )
+    title_kwargs = {'title_id': title.id}
+    review_kwargs = {**title_kwargs, 'review_id': review.id}
+    return [
+        Scenario('signup', 'POST', 'signup', prepare=user_data),
+        Scenario(
+            'token', 'POST', 'get_token', data={
+                'username': users[USER].username,
+                'confirmation_code': BENCH_CONFIRMATION_CODE,
+            }
+        ),
+        Scenario(
+            'category-create', 'POST', 'category-list', role=ADMIN,
+            prepare=partial(slug_object_data, Category)
+        ),
+        Scenario(
+            'category-delete', 'DELETE', 'category-detail', role=ADMIN,
+            prepare=partial(new_slug_object, Category)
+        ),
+        Scenario(
+            'genre-create', 'POST', 'genre-list', role=ADMIN,
+            prepare=partial(slug_object_data, Genre)
+        ),
+        Scenario(
+            'genre-delete', 'DELETE', 'genre-detail', role=ADMIN,
+            prepare=partial(new_slug_object, Genre)
+        ),
+        Scenario(
+            'title-create', 'POST', 'title-list', role=ADMIN,
+            prepare=partial(title_data, title, targets['genre'])
+        ),
+        Scenario(
+            'title-update', 'PATCH', 'title-detail', {'pk': title.id},
+            role=ADMIN, data={'description': 'bench'}
+        ),
+        Scenario(
+            'title-delete', 'DELETE', 'title-detail', role=ADMIN,
+            prepare=partial(new_title, title)
+        ),
+        Scenario(
+            'review-create', 'POST', 'review-list', title_kwargs, role=USER,
+            data={'text': 'bench', 'score': MIN_RATE},
+            prepare=partial(drop_review, title, users[USER])
+        ),
+        Scenario(
+            'review-create-own', 'PUT', 'review-replace-own', title_kwargs,
+            role=USER, data={'text': 'bench', 'score': MIN_RATE},
+            prepare=partial(drop_review, title, users[USER])
+        ),
+        Scenario(
+            'review-replace-own', 'PUT', 'review-replace-own', title_kwargs,
+            role=USER, data={'text': 'bench', 'score': MIN_RATE},
+            prepare=partial(own_review, title, users[USER])
+        ),
+        Scenario(
+            'review-update', 'PATCH', 'review-detail',
+            {**title_kwargs, 'pk': review.id}, role=ADMIN,
+            data={'text': review.text}
+        ),
+        Scenario(
+            'review-delete', 'DELETE', 'review-detail', role=USER,
+            prepare=partial(new_review, title, users[USER])
+        ),
+        Scenario(
+            'comment-create', 'POST', 'comment-list', review_kwargs,
+            role=USER, data={'text': 'bench'}
+        ),
+        Scenario(
+            'comment-update', 'PATCH', 'comment-detail',
+            {**review_kwargs, 'pk': comment.id}, role=ADMIN,
+            data={'text': comment.text}
+        ),
+        Scenario(
+            'comment-delete', 'DELETE', 'comment-detail', role=USER,
+            prepare=partial(new_comment, review, users[USER])
+        ),
+        Scenario(
+            'user-create', 'POST', 'user-list', role=ADMIN,
+            prepare=user_data
+        ),
+        Scenario(
+            'user-update', 'PATCH', 'user-detail',
+            {'username': targets['user'].username}, role=ADMIN,
+            data={'bio': 'bench'}
+        ),
+        Scenario(
+            'user-delete', 'DELETE', 'user-detail', role=ADMIN,
+            prepare=new_user
+        ),
+        Scenario(
+            'me-update', 'PATCH', 'user-get-user-info', role=USER,
+            data={'bio': 'bench'}
+        ),
+    ]
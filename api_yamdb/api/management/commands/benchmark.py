@@ -0,0 +1,307 @@
+import json
+import platform
+from datetime import datetime, timezone
+from io import StringIO
+from math import ceil
+from time import perf_counter
+
+import django
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import (CaptureQueriesContext, setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.cache import get_cache
+from api.management.commands._scenarios import (
+    get_bench_users, get_read_scenarios, get_route_methods, get_targets,
+    get_write_scenarios
+)
+from users.tokens import get_access_token
+
+PERCENTILES = (50, 90, 99)
+DATASET_MODELS = (
+    'users.customuser', 'reviews.category', 'reviews.genre',
+    'reviews.title', 'reviews.review', 'reviews.comment',
+)
+
+
+def percentile(timings, rank):
+    """Процентиль по методу ближайшего ранга."""
+    ordered = sorted(timings)
+    return ordered[max(ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """Сравни отчёт с базовым и верни список регрессий.
+
+    Регрессия — больше SQL-запросов, чем в базовом отчёте, либо рост
+    p50/p99 или размера ответа больше чем на tolerance (доля), причём
+    время должно вырасти ещё и не меньше чем на min_delta_ms.
+    """
+    regressions = []
+    for name, result in report['routes'].items():
+        base = baseline.get('routes', {}).get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: запросов к базе {result["queries"]} '
+                f'вместо {base["queries"]}'
+            )
+        for key in ('p50_ms', 'p99_ms'):
+            if (
+                result[key] > base[key] * (1 + tolerance)
+                and result[key] - base[key] >= min_delta_ms
+            ):
+                regressions.append(
+                    f'{name}: {key} {result[key]:.2f} мс '
+                    f'вместо {base[key]:.2f} мс'
+                )
+        if result['bytes'] > base['bytes'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: ответ {result["bytes"]} байт '
+                f'вместо {base["bytes"]}'
+            )
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа, число SQL-запросов и размер ответа '
+        'для всех маршрутов API на сгенерированном наборе данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--titles', type=int, default=500)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Сколько раз замерять каждый сценарий.'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Сколько запросов выполнить до замера.'
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кэш ответов API перед каждым замеряемым запросом.'
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Выполнить только сценарии с этими именами или префиксами.'
+        )
+        parser.add_argument(
+            '--in-place',
+            action='store_true',
+            help=(
+                'Работать с настроенной базой, а не с временной тестовой. '
+                'Пишущие сценарии изменят её данные.'
+            )
+        )
+        parser.add_argument(
+            '--no-seed',
+            action='store_true',
+            help='Не генерировать данные: замерять на уже имеющихся.'
+        )
+        parser.add_argument(
+            '--output', type=str, help='Куда записать отчёт в JSON.'
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            help='Базовый отчёт: регрессии относительно него — ошибка.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Допустимый рост времени и размера ответа, доля.'
+        )
+        parser.add_argument(
+            '--min-delta-ms',
+            type=float,
+            default=1.0,
+            help='Меньший рост времени не считается регрессией.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            setup_test_environment()
+            own_environment = True
+        except RuntimeError:
+            # Уже запущены внутри тестов.
+            own_environment = False
+        old_name = None
+        if not options['in_place']:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+        try:
+            report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            if own_environment:
+                teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+            regressions = compare(
+                report, baseline, options['tolerance'],
+                options['min_delta_ms']
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(f'Найдено регрессий: {len(regressions)}.')
+            self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
+
+    def run(self, options):
+        if not options['no_seed']:
+            call_command(
+                'generate_data',
+                users=options['users'],
+                titles=options['titles'],
+                reviews=options['reviews'],
+                comments=options['comments'],
+                seed=options['seed'],
+                stdout=StringIO()
+            )
+        targets = get_targets()
+        if targets is None:
+            raise CommandError(
+                'Нет данных для замера: нужны произведение, отзыв '
+                'и комментарий.'
+            )
+        users = get_bench_users()
+        clients = {None: APIClient()}
+        for role, user in users.items():
+            clients[role] = APIClient()
+            clients[role].credentials(
+                HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+            )
+        scenarios = [
+            scenario for scenario in (
+                get_read_scenarios(targets)
+                + get_write_scenarios(targets, users)
+            )
+            if not options['only'] or any(
+                scenario.name.startswith(prefix)
+                for prefix in options['only']
+            )
+        ]
+
+        routes = {}
+        for scenario in scenarios:
+            routes[scenario.name] = self.measure(
+                scenario, clients[scenario.role], options
+            )
+            self.write_result(scenario.name, routes[scenario.name])
+
+        covered = {(scenario.route, scenario.method) for scenario in scenarios}
+        uncovered = sorted(
+            f'{method} {route}'
+            for route, method in get_route_methods() - covered
+        )
+        if uncovered and not options['only']:
+            self.stderr.write(
+                'Маршруты без сценария: ' + ', '.join(uncovered)
+            )
+        return {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'cold': options['cold'],
+                'dataset': {
+                    label: apps.get_model(label).objects.count()
+                    for label in DATASET_MODELS
+                },
+            },
+            'routes': routes,
+            'uncovered': uncovered,
+        }
+
+    @staticmethod
+    def prepare(scenario):
+        """Подготовь данные повтора сценария: вне замера и подсчёта."""
+        fields = scenario._asdict()
+        if scenario.prepare is not None:
+            fields.update(scenario.prepare())
+        return fields
+
+    def request(self, fields, client, cold):
+        """Выполни подготовленный запрос и верни ответ и время в мс."""
+        path = reverse(fields['route'], kwargs=fields['kwargs'])
+        method = getattr(client, fields['method'].lower())
+        if cold:
+            get_cache().clear()
+        if fields['method'] == 'GET':
+            arguments = {'data': fields['params']}
+        else:
+            arguments = {'data': fields['data'], 'format': 'json'}
+        started = perf_counter()
+        response = method(path, **arguments)
+        return response, (perf_counter() - started) * 1000
+
+    def measure(self, scenario, client, options):
+        fields = self.prepare(scenario)
+        # При DEBUG журнал запросов мог заполниться до предела при
+        # генерации данных, и новые запросы в нём не были бы видны.
+        reset_queries()
+        # Запросы к базе считаются без кэша ответов и в тёплом режиме:
+        # иначе чтения из кэша скрыли бы лишние запросы от --baseline.
+        with CaptureQueriesContext(connection) as queries:
+            response, _ = self.request(fields, client, cold=True)
+        query_count = len(queries)
+        if response.status_code >= 400:
+            raise CommandError(
+                f'Сценарий {scenario.name}: ответ {response.status_code} '
+                f'{response.content[:200]!r}'
+            )
+        for _ in range(options['warmup']):
+            self.request(self.prepare(scenario), client, options['cold'])
+        timings = [
+            self.request(self.prepare(scenario), client, options['cold'])[1]
+            for _ in range(max(options['iterations'], 1))
+        ]
+        result = {
+            'method': scenario.method,
+            'route': scenario.route,
+            'path': response.request['PATH_INFO'],
+            'status': response.status_code,
+            'queries': query_count,
+            'bytes': len(response.content),
+            'mean_ms': sum(timings) / len(timings),
+            'max_ms': max(timings),
+        }
+        for rank in PERCENTILES:
+            result[f'p{rank}_ms'] = percentile(timings, rank)
+        return result
+
+    def write_result(self, name, result):
+        self.stdout.write(
+            f'{name:<20} {result["method"]:<6} {result["status"]} '
+            f'запросов {result["queries"]:>3}  {result["bytes"]:>7} байт  '
+            f'p50 {result["p50_ms"]:7.2f} мс  p99 {result["p99_ms"]:7.2f} мс'
+        )
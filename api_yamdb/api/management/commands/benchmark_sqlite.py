@@ -0,0 +1,247 @@
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from api.management.commands.benchmark import percentile
+
+SCHEMA = (
+    'CREATE TABLE bench_item ('
+    'id INTEGER PRIMARY KEY, score INTEGER NOT NULL, payload TEXT NOT NULL)',
+    'CREATE TABLE bench_total (id INTEGER PRIMARY KEY, total INTEGER)',
+    'INSERT INTO bench_total (id, total) VALUES (1, 0)',
+)
+READ_SQL = (
+    'SELECT count(*), avg(score) FROM bench_item WHERE id BETWEEN %s AND %s'
+)
+READ_RANGE = 200
+
+
+class Worker(threading.Thread):
+    """Поток воркера: каждая операция — отдельный «запрос».
+
+    После операции соединение закрывается так же, как Django делает
+    это в конце запроса: только если истёк CONN_MAX_AGE.
+    """
+
+    def __init__(self, alias, operation, rows, deadline, seed):
+        super().__init__(daemon=True)
+        self.alias = alias
+        self.operation = operation
+        self.rows = rows
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.timings = []
+        self.errors = 0
+
+    def run(self):
+        connection = connections[self.alias]
+        try:
+            while perf_counter() < self.deadline:
+                started = perf_counter()
+                try:
+                    self.operation(self)
+                except OperationalError:
+                    self.errors += 1
+                else:
+                    self.timings.append((perf_counter() - started) * 1000)
+                connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+
+    def read(self):
+        start = self.random.randint(1, max(self.rows - READ_RANGE, 1))
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(READ_SQL, (start, start + READ_RANGE))
+            cursor.fetchone()
+
+    def write(self):
+        # Чтение и запись в одной транзакции, как при пересчёте рейтинга.
+        with transaction.atomic(using=self.alias):
+            with connections[self.alias].cursor() as cursor:
+                cursor.execute('SELECT total FROM bench_total WHERE id = 1')
+                cursor.fetchone()
+                score = self.random.randint(1, 10)
+                cursor.execute(
+                    'INSERT INTO bench_item (score, payload) VALUES (%s, %s)',
+                    (score, 'x' * 200)
+                )
+                cursor.execute(
+                    'UPDATE bench_total SET total = total + %s WHERE id = 1',
+                    (score,)
+                )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает профили соединений с SQLite из SQLITE_PROFILES '
+        'при одновременных чтениях и записях из нескольких потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles',
+            nargs='+',
+            default=['development', 'production'],
+            help='Профили из SQLITE_PROFILES.'
+        )
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=5.0,
+            help='Длительность замера для каждого профиля, секунды.'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=20000,
+            help='Строк в таблице перед замером.'
+        )
+        parser.add_argument(
+            '--connects',
+            type=int,
+            default=50,
+            help='Сколько соединений открыть для замера их стоимости.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', type=str, help='Куда записать отчёт в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['profiles']) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(
+                'Неизвестные профили: ' + ', '.join(sorted(unknown))
+            )
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'readers': options['readers'],
+                'writers': options['writers'],
+                'duration': options['duration'],
+                'rows': options['rows'],
+            },
+            'profiles': {},
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in options['profiles']:
+                alias = f'benchmark_{profile}'
+                connections.databases[alias] = {
+                    **settings.SQLITE_PROFILES[profile],
+                    'ENGINE': settings.DATABASES['default']['ENGINE'],
+                    'NAME': os.path.join(directory, f'{profile}.sqlite3'),
+                }
+                connections.ensure_defaults(alias)
+                connections.prepare_test_settings(alias)
+                try:
+                    result = self.run(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections[alias]
+                    del connections.databases[alias]
+                report['profiles'][profile] = result
+                self.write_result(profile, result)
+        self.write_gain(report['profiles'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def run(self, alias, options):
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany(
+                'INSERT INTO bench_item (score, payload) VALUES (%s, %s)',
+                [(number % 10 + 1, 'x' * 200)
+                 for number in range(options['rows'])]
+            )
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        connection.close()
+
+        connect_timings = []
+        for _ in range(options['connects']):
+            started = perf_counter()
+            connection.ensure_connection()
+            connect_timings.append((perf_counter() - started) * 1000)
+            connection.close()
+
+        deadline = perf_counter() + options['duration']
+        workers = [
+            Worker(alias, Worker.read, options['rows'], deadline,
+                   options['seed'] + number)
+            for number in range(options['readers'])
+        ] + [
+            Worker(alias, Worker.write, options['rows'], deadline,
+                   options['seed'] + options['readers'] + number)
+            for number in range(options['writers'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        result = {
+            'journal_mode': journal_mode,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'connect_ms': sum(connect_timings) / len(connect_timings)
+            if connect_timings else None,
+        }
+        for kind, group in (
+            ('reads', workers[:options['readers']]),
+            ('writes', workers[options['readers']:]),
+        ):
+            timings = [timing for worker in group for timing in worker.timings]
+            result[kind] = len(timings)
+            result[f'{kind}_per_s'] = len(timings) / options['duration']
+            result[f'{kind}_errors'] = sum(worker.errors for worker in group)
+            for rank in (50, 99):
+                result[f'{kind}_p{rank}_ms'] = (
+                    percentile(timings, rank) if timings else None
+                )
+        return result
+
+    def write_result(self, profile, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{profile} (journal_mode={result["journal_mode"]}, '
+            f'CONN_MAX_AGE={result["conn_max_age"]})'
+        ))
+        if result['connect_ms'] is not None:
+            self.stdout.write(
+                f'  открытие соединения {result["connect_ms"]:.3f} мс'
+            )
+        for kind, title in (('reads', 'чтения'), ('writes', 'записи')):
+            line = (
+                f'  {title:<7} {result[f"{kind}_per_s"]:9.1f} в секунду, '
+                f'ошибок {result[f"{kind}_errors"]}'
+            )
+            if result[kind]:
+                line += (
+                    f', p50 {result[f"{kind}_p50_ms"]:.2f} мс, '
+                    f'p99 {result[f"{kind}_p99_ms"]:.2f} мс'
+                )
+            self.stdout.write(line)
+
+    def write_gain(self, results):
+        if not {'development', 'production'} <= set(results):
+            return
+        base, tuned = results['development'], results['production']
+        for kind, title in (('reads', 'чтений'), ('writes', 'записей')):
+            if base[kind]:
+                self.stdout.write(self.style.SUCCESS(
+                    f'production: {title} в секунду в '
+                    f'{tuned[kind] / base[kind]:.1f} раза больше'
+                ))
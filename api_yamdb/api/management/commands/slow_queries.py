@@ -0,0 +1,145 @@
+import json
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api_yamdb.instrumentation import fingerprint
+
+# SQLite: «SCAN reviews_title» без индекса; PostgreSQL: «Seq Scan on ...».
+FULL_SCAN_PATTERNS = (
+    re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b.*\bINDEX\b)'),
+    re.compile(r'Seq Scan on (\w+)'),
+)
+ORDERINGS = {
+    'total': lambda group: group['total_ms'],
+    'count': lambda group: group['count'],
+    'max': lambda group: group['slowest']['duration_ms'],
+    'mean': lambda group: group['total_ms'] / group['count'],
+}
+
+
+def full_scans(plan):
+    """Таблицы, которые план читает целиком, без индекса."""
+    tables = []
+    for line in plan or ():
+        for pattern in FULL_SCAN_PATTERNS:
+            match = pattern.search(line.strip())
+            if match and match.group(1) not in tables:
+                tables.append(match.group(1))
+    return tables
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит самые затратные медленные SQL-запросы из журнала '
+        'SlowQueryMiddleware, сгруппированные по виду запроса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            default=settings.SLOW_QUERY_LOG_FILE,
+            help='Журнал медленных запросов в формате JSON Lines.'
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--order-by',
+            choices=sorted(ORDERINGS),
+            default='total',
+            help='Суммарное, максимальное, среднее время или число запросов.'
+        )
+        parser.add_argument(
+            '--view',
+            type=str,
+            help='Только запросы представления или маршрута с таким именем.'
+        )
+        parser.add_argument(
+            '--scans-only',
+            action='store_true',
+            help='Только запросы, читающие таблицы целиком.'
+        )
+
+    def read_entries(self, path, view):
+        try:
+            file = open(path, encoding='utf-8')
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {path} не найден.')
+        skipped = 0
+        with file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                names = (entry.get('view'), entry.get('route'))
+                if view and view not in names:
+                    continue
+                yield entry
+        if skipped:
+            self.stderr.write(f'Пропущено повреждённых строк: {skipped}.')
+
+    def group(self, entries):
+        groups = {}
+        for entry in entries:
+            key = entry.get('fingerprint') or fingerprint(entry['sql'])
+            group = groups.setdefault(key, {
+                'fingerprint': key,
+                'count': 0,
+                'total_ms': 0.0,
+                'views': set(),
+                'slowest': entry,
+            })
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            group['views'].add(
+                f'{entry.get("view")} ({entry.get("route")})'
+                if entry.get('view') else entry.get('path', '?')
+            )
+            if entry['duration_ms'] > group['slowest']['duration_ms']:
+                group['slowest'] = entry
+        return groups.values()
+
+    def write_group(self, number, group):
+        slowest = group['slowest']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{number}. {group["count"]} раз, всего '
+            f'{group["total_ms"]:.1f} мс, в среднем '
+            f'{group["total_ms"] / group["count"]:.1f} мс, максимум '
+            f'{slowest["duration_ms"]:.1f} мс'
+        ))
+        self.stdout.write(
+            '   Представления: ' + ', '.join(sorted(group['views']))
+        )
+        self.stdout.write(f'   SQL: {group["fingerprint"]}')
+        if slowest.get('params'):
+            self.stdout.write(f'   Параметры: {slowest["params"]}')
+        if slowest.get('plan'):
+            self.stdout.write('   План самого медленного:')
+            for line in slowest['plan']:
+                self.stdout.write(f'     {line}')
+        scans = full_scans(slowest.get('plan'))
+        if scans:
+            self.stdout.write(self.style.WARNING(
+                '   Полный просмотр таблиц: ' + ', '.join(scans)
+            ))
+
+    def handle(self, *args, **options):
+        groups = self.group(
+            self.read_entries(options['file'], options['view'])
+        )
+        if options['scans_only']:
+            groups = [
+                group for group in groups
+                if full_scans(group['slowest'].get('plan'))
+            ]
+        top = sorted(
+            groups, key=ORDERINGS[options['order_by']], reverse=True
+        )[:options['top']]
+        if not top:
+            self.stdout.write('Медленных запросов не найдено.')
+            return
+        for number, group in enumerate(top, 1):
+            self.write_group(number, group)
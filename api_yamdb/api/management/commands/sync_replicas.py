@@ -0,0 +1,37 @@
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.replicas import sync_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики DATABASE_REPLICAS '
+        'через backup API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Повторять каждые столько секунд, пока не прервут.'
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не заданы: укажите пути в SQLITE_REPLICAS.'
+            )
+        while True:
+            started = perf_counter()
+            sync_replicas()
+            self.stdout.write(
+                f'Реплики обновлены за '
+                f'{(perf_counter() - started) * 1000:.1f} мс: '
+                + ', '.join(settings.DATABASE_REPLICAS)
+            )
+            if options['interval'] is None:
+                return
+            sleep(options['interval'])
@@ -0,0 +1,330 @@
+"""Счётчики и гистограммы, общие для всех процессов-воркеров.
+
+Каждый процесс пишет значения в собственный файл в METRICS_DIR,
+отображённый в память: запись — это изменение нескольких байт без
+блокировок между процессами. Выдача /metrics читает все файлы каталога
+и складывает значения. Файлы завершившихся процессов при этом
+переносятся в общий архивный файл, так что счётчики не убывают,
+а число файлов не растёт.
+
+Формат файла: 8 байт — длина занятой части, затем записи вида
+<длина ключа, 4 байта><ключ><выравнивание до 8 байт><значение, double>.
+"""
+import fcntl
+import json
+import mmap
+import os
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from struct import Struct
+
+from django.conf import settings
+
+HEADER = Struct('Q')
+KEY_LENGTH = Struct('I')
+VALUE = Struct('d')
+INITIAL_SIZE = 64 * 1024
+FILE_SUFFIX = '.metrics'
+ARCHIVE_NAME = 'archive'
+LOCK_NAME = '.lock'
+
+REGISTRY = {}
+
+
+def read_entries(buffer, used):
+    """Ключи, значения и смещения значений из содержимого файла."""
+    offset = HEADER.size
+    while offset < used:
+        (length,) = KEY_LENGTH.unpack_from(buffer, offset)
+        start = offset + KEY_LENGTH.size
+        key = bytes(buffer[start:start + length]).decode()
+        position = start + length + (-(KEY_LENGTH.size + length) % 8)
+        (value,) = VALUE.unpack_from(buffer, position)
+        yield key, value, position
+        offset = position + VALUE.size
+
+
+class MmapStore:
+    """Значения метрик одного процесса в файле, отображённом в память."""
+
+    def __init__(self, directory, name=None):
+        self.directory = directory
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.fd = os.open(
+            os.path.join(directory, f'{name or self.pid}{FILE_SUFFIX}'),
+            os.O_RDWR | os.O_CREAT
+        )
+        size = os.fstat(self.fd).st_size
+        if size < INITIAL_SIZE:
+            os.ftruncate(self.fd, INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self.map = mmap.mmap(self.fd, size)
+        # Файл мог остаться от прошлого процесса с тем же pid:
+        # продолжаем его значения, счётчики остаются монотонными.
+        self.used = HEADER.unpack_from(self.map)[0] or HEADER.size
+        self.positions = {
+            key: position
+            for key, _, position in read_entries(self.map, self.used)
+        }
+
+    def add(self, key, amount):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self.allocate(key)
+            (value,) = VALUE.unpack_from(self.map, position)
+            VALUE.pack_into(self.map, position, value + amount)
+
+    def allocate(self, key):
+        encoded = key.encode()
+        position = self.used + KEY_LENGTH.size + len(encoded)
+        position += -(KEY_LENGTH.size + len(encoded)) % 8
+        end = position + VALUE.size
+        if end > len(self.map):
+            self.grow(end)
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        start = self.used + KEY_LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        VALUE.pack_into(self.map, position, 0.0)
+        # Длина занятой части пишется последней: читатель не увидит
+        # недописанную запись.
+        self.used = end
+        HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    def grow(self, needed):
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        self.map.close()
+        os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Файл текущего процесса; после fork у потомка заводится свой."""
+    global _store
+    directory = settings.METRICS_DIR
+    if not directory:
+        return None
+    store = _store
+    if (
+        store is None or store.pid != os.getpid()
+        or store.directory != directory
+    ):
+        with _store_lock:
+            store = _store
+            if (
+                store is None or store.pid != os.getpid()
+                or store.directory != directory
+            ):
+                store = _store = MmapStore(directory)
+    return store
+
+
+def read_file(path):
+    """Ключи и значения из файла метрик."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return
+    used = min(HEADER.unpack_from(data)[0], len(data))
+    for key, value, _ in read_entries(data, used):
+        yield key, value
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def archive_dead(directory):
+    """Перенеси значения завершившихся процессов в архивный файл.
+
+    Блокировка не даёт двум сборщикам перенести один файл дважды.
+    """
+    with open(os.path.join(directory, LOCK_NAME), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = [
+            filename for filename in os.listdir(directory)
+            if filename.endswith(FILE_SUFFIX)
+            and filename[:-len(FILE_SUFFIX)].isdigit()
+            and not is_alive(int(filename[:-len(FILE_SUFFIX)]))
+        ]
+        if not dead:
+            return
+        archive = MmapStore(directory, ARCHIVE_NAME)
+        try:
+            for filename in dead:
+                path = os.path.join(directory, filename)
+                for key, value in read_file(path):
+                    archive.add(key, value)
+                os.remove(path)
+        finally:
+            archive.close()
+
+
+def collect(directory=None):
+    """Сложи значения из файлов всех процессов."""
+    directory = directory or settings.METRICS_DIR
+    totals = defaultdict(float)
+    if not directory or not os.path.isdir(directory):
+        return totals
+    archive_dead(directory)
+    for filename in os.listdir(directory):
+        if not filename.endswith(FILE_SUFFIX):
+            continue
+        for key, value in read_file(os.path.join(directory, filename)):
+            totals[key] += value
+    return totals
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def key(self, suffix, labels):
+        values = [str(labels[name]) for name in self.labelnames]
+        return json.dumps([self.name, suffix, values], ensure_ascii=False)
+
+    def add(self, suffix, labels, amount):
+        store = get_store()
+        if store is not None:
+            store.add(self.key(suffix, labels), amount)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.add('', labels, amount)
+
+    def samples(self, values):
+        for labels, value in sorted(values.get('', {}).items()):
+            yield self.name, labels, value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+    DEFAULT_BUCKETS = (
+        .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10
+    )
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        self.add(f'bucket:{bisect_left(self.buckets, value)}', labels, 1)
+        self.add('sum', labels, value)
+        self.add('count', labels, 1)
+
+    def samples(self, values):
+        bounds = [*map(format_value, self.buckets), '+Inf']
+        for labels in sorted(values.get('count', {})):
+            cumulative = 0
+            for index, bound in enumerate(bounds):
+                cumulative += values.get(f'bucket:{index}', {}).get(
+                    labels, 0
+                )
+                yield (
+                    f'{self.name}_bucket', (*labels, ('le', bound)),
+                    cumulative
+                )
+            yield f'{self.name}_sum', labels, values['sum'].get(labels, 0)
+            yield f'{self.name}_count', labels, values['count'][labels]
+
+
+def format_value(value):
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def render(totals=None):
+    """Метрики в текстовом формате Prometheus."""
+    if totals is None:
+        totals = collect()
+    grouped = defaultdict(lambda: defaultdict(dict))
+    for key, value in totals.items():
+        name, suffix, label_values = json.loads(key)
+        metric = REGISTRY.get(name)
+        if metric is None or len(label_values) != len(metric.labelnames):
+            continue
+        labels = tuple(zip(metric.labelnames, label_values))
+        grouped[name][suffix][labels] = value
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.type}')
+        for sample, labels, value in metric.samples(grouped[name]):
+            label_text = ','.join(
+                f'{label}="{escape(label_value)}"'
+                for label, label_value in labels
+            )
+            if label_text:
+                sample = f'{sample}{{{label_text}}}'
+            lines.append(f'{sample} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUESTS = Counter(
+    'api_requests_total',
+    'Число обработанных запросов.',
+    ('route', 'method', 'status')
+)
+REQUEST_DURATION = Histogram(
+    'api_request_duration_seconds',
+    'Время обработки запроса.',
+    ('route', 'method')
+)
+REQUEST_QUERIES = Histogram(
+    'api_request_db_queries',
+    'Число SQL-запросов на один запрос к API.',
+    ('route', 'method'),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+RESPONSE_CACHE = Counter(
+    'api_response_cache_total',
+    'Обращения к кэшу ответов: hit, miss или not_modified.',
+    ('route', 'result')
+)
+EMAIL_DURATION = Histogram(
+    'api_email_send_duration_seconds',
+    'Время отправки письма.',
+    ('status',)
+)
+EMAIL_OUTBOX = Counter(
+    'api_email_outbox_total',
+    'Исходы попыток отправки писем из очереди: sent, retry или failed.',
+    ('result',)
+)
@@ -0,0 +1,173 @@
+import logging
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.permissions import SAFE_METHODS
+
+from api import metrics, profiling, replicas
+from api_yamdb.instrumentation import (QueryCounter, collect_timings,
+                                       execute_wrappers, record_slow_queries)
+
+logger = logging.getLogger('api.timing')
+
+
+class RequestTimingMiddleware:
+    """Замеряет время базы, сериализации и рендеринга для выборки запросов.
+
+    Доля замеряемых запросов задаётся REQUEST_TIMING_SAMPLE_RATE.
+    Результат уходит в журнал `api.timing`, а заголовок Server-Timing
+    с числом SQL-запросов видят только администраторы (и все при DEBUG).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        with collect_timings() as timings:
+            response = self.get_response(request)
+            timings.finish()
+        if settings.DEBUG or profiling.is_admin(request):
+            response['Server-Timing'] = timings.server_timing()
+        match = request.resolver_match
+        logger.info(
+            '%s %s %s %.1f ms',
+            request.method,
+            request.path,
+            response.status_code,
+            timings.total,
+            extra={'data': {
+                'method': request.method,
+                'path': request.path,
+                'route': match.view_name if match else None,
+                'status': response.status_code,
+                'bytes': (
+                    None if response.streaming else len(response.content)
+                ),
+                **timings.as_dict(),
+            }}
+        )
+        return response
+
+
+class SlowQueryMiddleware:
+    """Записывает SQL-запросы дольше SLOW_QUERY_THRESHOLD_MS с их планами.
+
+    Включается заданием порога; записи в формате JSON Lines копятся
+    в SLOW_QUERY_LOG_FILE, сводку по ним выводит команда slow_queries.
+    Стоит первым в MIDDLEWARE, чтобы EXPLAIN не попадал в Server-Timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is None:
+            return self.get_response(request)
+        with record_slow_queries(
+            request, threshold, settings.SLOW_QUERY_LOG_FILE
+        ):
+            return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Считает запросы, их время и число SQL-запросов по маршрутам.
+
+    Маршрут — имя из роутера (`title-list`, `review-detail`);
+    запросы к несуществующим адресам идут под именем `unmatched`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_DIR:
+            return self.get_response(request)
+        counter = QueryCounter()
+        started = perf_counter()
+        with execute_wrappers(lambda connection: counter):
+            response = self.get_response(request)
+        elapsed = perf_counter() - started
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        metrics.REQUESTS.inc(
+            route=route, method=request.method, status=response.status_code
+        )
+        metrics.REQUEST_DURATION.observe(
+            elapsed, route=route, method=request.method
+        )
+        metrics.REQUEST_QUERIES.observe(
+            counter.count, route=route, method=request.method
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос администратора через cProfile по его просьбе.
+
+    Флаг — заголовок `X-Profile` или параметр `profile`, значения описаны
+    в `api.profiling`. Запросы без флага проходят без проверок токена,
+    а флаг от не-администратора просто не действует.
+    """
+
+    CONTENT_TYPES = {
+        'collapsed': 'text/plain; charset=utf-8',
+        'text': 'text/plain; charset=utf-8',
+        'pstats': 'application/octet-stream',
+    }
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiling.get_profile_mode(request)
+        if mode is None or not profiling.is_admin(request):
+            return self.get_response(request)
+        response, result = profiling.profile(self.get_response, request)
+        if mode == 'pstats':
+            content = profiling.dump(result.stats)
+        elif mode == 'collapsed':
+            content = result.collapsed
+        elif mode == 'text':
+            content = profiling.as_text(result.stats)
+        else:
+            response['X-Profile-Id'] = profiling.store(result, request)
+            return response
+        profiled = HttpResponse(
+            content, content_type=self.CONTENT_TYPES[mode]
+        )
+        profiled['X-Profiled-Status'] = response.status_code
+        if mode == 'pstats':
+            profiled['Content-Disposition'] = (
+                'attachment; filename="profile.pstats"'
+            )
+        return profiled
+
+
+class ReplicaMiddleware:
+    """Направляет безопасные запросы к каталогу на реплики базы.
+
+    Работает, только если заданы DATABASE_REPLICAS; представление
+    выбирает чтение с реплики атрибутом `read_from_replica`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        with replicas.request_scope():
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if request.method in SAFE_METHODS and getattr(
+            view_class, 'read_from_replica', False
+        ):
+            replicas.allow_replica_reads()
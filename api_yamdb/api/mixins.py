@@ -1,9 +1,44 @@
 from rest_framework import filters, mixins, viewsets
 
+from api.cache import get_cached_response
 from users.permissions import IsAdminOrReadOnly
 
 
+class CachedListMixin:
+    """Кэширует ответы list до записи в модели из `cache_dependencies`.
+
+    Ответы несут ETag и Last-Modified, условные GET-запросы
+    получают 304 без обращения к сериализаторам. Зависимость `(модель,
+    поле)` учитывает только записи с тем же значением поля, что
+    и в адресе запроса.
+    """
+
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return get_cached_response(
+            self, super().list, request, *args, **kwargs
+        )
+
+
+class CachedListRetrieveMixin(CachedListMixin):
+    """Кэширует ответы list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return get_cached_response(
+            self, super().retrieve, request, *args, **kwargs
+        )
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы читают каталог с реплики, см. `api.replicas`."""
+
+    read_from_replica = True
+
+
 class AllowedMethodsMixin(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -0,0 +1,176 @@
+"""Профилирование отдельных запросов через cProfile по просьбе администратора.
+
+Запрос профилируется, если в нём есть заголовок `X-Profile` или
+параметр `profile`. Значение задаёт, что вернуть:
+
+- `pstats` — двоичный файл pstats вместо ответа;
+- `collapsed` — стеки в свёрнутом формате для flamegraph.pl и speedscope,
+  вес строки — число выборок раз в PROFILE_SAMPLE_INTERVAL секунд;
+- `text` — сводку pstats, отсортированную по суммарному времени;
+- любое другое — обычный ответ, а оба файла сохраняются в PROFILE_DIR,
+  их имя приходит в заголовке `X-Profile-Id`.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+
+from users.permissions import AdminOnly
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+TEXT_LIMIT = 60
+
+ProfileResult = namedtuple('ProfileResult', ('stats', 'collapsed'))
+
+
+def get_profile_mode(request):
+    """Значение флага профилирования или None, если его нет."""
+    mode = request.META.get(PROFILE_HEADER)
+    if mode is None:
+        mode = request.GET.get(PROFILE_PARAM)
+    return mode
+
+
+def is_admin(request):
+    """Проверь права по токену: middleware работает раньше DRF."""
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        if result is not None:
+            return AdminOnly().has_permission(
+                SimpleNamespace(user=result[0]), None
+            )
+    return False
+
+
+def frame_name(code):
+    filename = os.path.basename(code.co_filename)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class StackSampler(threading.Thread):
+    """Снимает стек потока запроса через равные промежутки времени.
+
+    Граф вызовов cProfile хранит только пары «вызывающий — вызываемый»
+    и зацикливается на цепочке middleware, поэтому стеки для flamegraph
+    собираются отдельно выборкой. В учёт идут только стеки под кадром
+    с кодом `root_code`, сам он и всё выше него отбрасываются.
+    """
+
+    def __init__(self, thread_id, interval, root_code):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stopped = threading.Event()
+        self.counts = Counter()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            if frame is not None and stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        """Стеки в свёрнутом формате: `a;b;c <число выборок>`."""
+        return ''.join(
+            f'{stack} {count}\n'
+            for stack, count in sorted(self.counts.items())
+        )
+
+
+def as_text(stats):
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats('cumulative').print_stats(TEXT_LIMIT)
+    return output.getvalue()
+
+
+def store(result, request):
+    """Сохрани pstats и свёрнутые стеки в PROFILE_DIR и верни их имя."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    match = request.resolver_match
+    profile_id = '-'.join((
+        datetime.now().strftime('%Y%m%d%H%M%S'),
+        match.view_name if match else 'unmatched',
+        uuid4().hex[:8],
+    ))
+    base = os.path.join(settings.PROFILE_DIR, profile_id)
+    result.stats.dump_stats(f'{base}.pstats')
+    with open(f'{base}.collapsed', 'w', encoding='utf-8') as file:
+        file.write(result.collapsed)
+    prune(settings.PROFILE_DIR, settings.PROFILE_MAX_COUNT)
+    return profile_id
+
+
+def prune(directory, keep):
+    """Удали самые старые профили, оставив последние `keep`."""
+    profiles = {}
+    for entry in os.scandir(directory):
+        profile_id, extension = os.path.splitext(entry.name)
+        if extension in ('.pstats', '.collapsed'):
+            profiles.setdefault(profile_id, []).append(entry)
+    oldest = sorted(
+        profiles.values(),
+        key=lambda entries: max(entry.stat().st_mtime for entry in entries)
+    )
+    for entries in oldest[:max(len(oldest) - keep, 0)]:
+        for entry in entries:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def run(get_response, request):
+    """Граница стеков выборки: учитывается только то, что под ней."""
+    return get_response(request)
+
+
+def profile(get_response, request):
+    """Выполни запрос под cProfile и с выборкой стеков.
+
+    Возвращает ответ и результат с полями stats (pstats.Stats)
+    и collapsed (стеки для flamegraph).
+    """
+    interval = settings.PROFILE_SAMPLE_INTERVAL
+    sampler = StackSampler(
+        threading.get_ident(), interval, run.__code__
+    )
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        response = run(get_response, request)
+    finally:
+        profiler.disable()
+        sampler.stop()
+    return response, ProfileResult(
+        pstats.Stats(profiler), sampler.collapsed()
+    )
+
+
+def dump(stats):
+    return marshal.dumps(stats.stats)
@@ -0,0 +1,23 @@
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from api_yamdb.instrumentation import timed
+
+
+class TimedRendererMixin:
+    """Учитывает время рендеринга ответа в Server-Timing.
+
+    Живёт здесь, а не в api.mixins: рендереры импортируются
+    из настроек DRF раньше, чем готовы его представления.
+    """
+
+    def render(self, *args, **kwargs):
+        with timed('render'):
+            return super().render(*args, **kwargs)
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
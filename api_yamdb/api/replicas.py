@@ -0,0 +1,97 @@
+"""Чтение каталога с реплик базы данных.
+
+Безопасные запросы (GET, HEAD, OPTIONS) к представлениям с
+`read_from_replica` читают модели каталога с одной из реплик
+DATABASE_REPLICAS; всё остальное идёт в основную базу. Первая запись
+закрепляет запрос за основной базой: дальше он читает только оттуда
+и видит собственные изменения.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_APPS = ('reviews',)
+
+_current = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    """Реплика текущего запроса и признак закрепления за основной базой."""
+
+    def __init__(self):
+        self.alias = None
+        self.pinned = False
+
+
+@contextmanager
+def request_scope():
+    """Состояние маршрутизации на время одного запроса."""
+    token = _current.set(ReplicaState())
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def allow_replica_reads():
+    """Разреши текущему запросу читать с реплики, выбранной случайно."""
+    state = _current.get()
+    if state is not None and settings.DATABASE_REPLICAS:
+        state.alias = random.choice(settings.DATABASE_REPLICAS)
+
+
+def pin():
+    """Закрепи текущий запрос за основной базой."""
+    state = _current.get()
+    if state is not None:
+        state.pinned = True
+
+
+def get_replica():
+    """Реплика, с которой сейчас читает запрос, или None."""
+    state = _current.get()
+    if state is None or state.pinned:
+        return None
+    return state.alias
+
+
+def may_lag(modified):
+    """Могут ли реплики ещё не видеть изменение, сделанное в modified."""
+    return (
+        get_replica() is not None
+        and time() - modified < settings.REPLICA_MAX_LAG
+    )
+
+
+class ReplicaRouter:
+    """Маршрутизатор баз: чтения каталога — на реплику запроса."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in REPLICA_APPS:
+            return None
+        return get_replica()
+
+    def db_for_write(self, model, **hints):
+        # Явно: иначе объект, прочитанный с реплики, сохранился бы туда же.
+        pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+def sync_replicas(aliases=None):
+    """Скопируй основную базу SQLite в реплики через backup API."""
+    source = connections[DEFAULT_DB_ALIAS]
+    source.ensure_connection()
+    for alias in aliases or settings.DATABASE_REPLICAS:
+        target = connections[alias]
+        target.ensure_connection()
+        source.connection.backup(target.connection)
@@ -1,14 +1,14 @@
 import datetime
 
-from django.db import models
-
+from django.db import transaction
 from rest_framework import serializers, validators
 
+from api_yamdb.instrumentation import TimedSerializerMixin
 from reviews.models import Category, Genre, Title, Review, Comment
 from reviews.constants import SLUG
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     slug = serializers.SlugField(
         max_length=SLUG,
         validators=[
@@ -24,7 +24,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     slug = serializers.SlugField(
         max_length=SLUG,
         validators=[
@@ -40,20 +40,20 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    rating = serializers.SerializerMethodField()
-    genre = serializers.SlugRelatedField(
-        many=True,
-        allow_null=True,
+class TitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    genre = serializers.ListField(
+        child=serializers.SlugField(max_length=SLUG),
         allow_empty=True,
-        slug_field='slug',
-        queryset=Genre.objects.all()
+        allow_null=True
     )
     category = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
     )
 
+    # Жанры, записанные create() или update().
+    written_genres = None
+
     class Meta:
         model = Title
         fields = (
@@ -68,7 +68,10 @@ class TitleSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'rating',)
 
     def to_representation(self, instance):
-        serializer = TitleSerializerSafe(instance)
+        # Жанры, найденные validate_genre, не запрашиваются повторно.
+        serializer = TitleSerializerSafe(
+            instance, context={'genres': self.written_genres}
+        )
         return serializer.data
 
     def validate_year(self, value):
@@ -77,17 +80,60 @@ class TitleSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Укажите реальный год.")
         return value
 
-    def get_rating(self, obj):
-        average = obj.reviews.all().aggregate(
-            models.Avg('score')
-        ).get('score__avg')
-        return average
+    def validate_genre(self, value):
+        """Найди все жанры по slug одним запросом; null — без жанров."""
+        if value is None:
+            return []
+        slugs = list(dict.fromkeys(value))
+        genres = Genre.objects.in_bulk(slugs, field_name='slug')
+        missing = [slug for slug in slugs if slug not in genres]
+        if missing:
+            raise serializers.ValidationError(
+                [f'Объект с slug={slug} не существует.' for slug in missing]
+            )
+        return [genres[slug] for slug in slugs]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = super().create(validated_data)
+        self.set_genres(title, genres, created=True)
+        self.written_genres = genres
+        return title
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            self.set_genres(title, genres)
+            self.written_genres = genres
+        return title
+
+    @staticmethod
+    def set_genres(title, genres, created=False):
+        """Запиши связи с жанрами одной вставкой."""
+        through = Title.genre.through
+        if not created:
+            through.objects.filter(title=title).delete()
+        through.objects.bulk_create(
+            through(title=title, genre=genre) for genre in genres
+        )
+
+
+class TitleGenresSerializer(serializers.ListSerializer):
+    """Жанры произведения: из контекста, если их уже загрузили при записи."""
 
+    def get_attribute(self, instance):
+        genres = self.context.get('genres')
+        if genres is None:
+            return super().get_attribute(instance)
+        return genres
 
-class TitleSerializerSafe(serializers.ModelSerializer):
-    rating = serializers.SerializerMethodField()
-    genre = GenreSerializer(
-        many=True,
+
+class TitleSerializerSafe(TimedSerializerMixin, serializers.ModelSerializer):
+    genre = TitleGenresSerializer(
+        child=GenreSerializer(),
         read_only=True
     )
     category = CategorySerializer(
@@ -107,14 +153,8 @@ class TitleSerializerSafe(serializers.ModelSerializer):
         )
         read_only_fields = ('rating',)
 
-    def get_rating(self, obj):
-        average = obj.reviews.all().aggregate(
-            models.Avg('score')
-        ).get('score__avg')
-        return average
-
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -127,7 +167,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ('author',)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
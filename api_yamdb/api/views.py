@@ -1,10 +1,19 @@
-from django.db import IntegrityError
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, serializers
+from rest_framework import status, viewsets, serializers
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from api import metrics
 from api.filters import TitleFilter
-from api.mixins import AllowedMethodsMixin
+from api.mixins import (AllowedMethodsMixin, CachedListRetrieveMixin,
+                        ReplicaReadMixin)
+from api.pagination import LimitOffsetOrCursorPagination
 from api.serializers import (
     CategorySerializer,
     GenreSerializer,
@@ -14,25 +23,34 @@ from api.serializers import (
     CommentSerializer,
 )
 from reviews.models import Category, Genre, Title, Review, Comment
-from users.permissions import IsAdminOrModeratorOrAuthor, IsAdminOrReadOnly
+from users.permissions import (AdminOnly, IsAdminOrModeratorOrAuthor,
+                               IsAdminOrReadOnly)
+
+User = get_user_model()
 
 
 class GenreViewSet(AllowedMethodsMixin):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_dependencies = (Genre,)
 
 
 class CategoryViewSet(AllowedMethodsMixin):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_dependencies = (Category,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(ReplicaReadMixin, CachedListRetrieveMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     http_method_names = ['get', 'post', 'patch', 'delete']
     filter_backends = (DjangoFilterBackend,)
     permission_classes = (IsAdminOrReadOnly,)
     filterset_class = TitleFilter
+    cache_dependencies = (Title, Genre, Category, Review)
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
@@ -40,38 +58,105 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, CachedListRetrieveMixin,
+                    viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
+    pagination_class = LimitOffsetOrCursorPagination
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminOrModeratorOrAuthor,)
+    cache_dependencies = ((Review, 'title_id'), Title, User)
 
-    def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        return Review.objects.filter(title=title_id)
+    @cached_property
+    def title(self):
+        """Произведение из адреса: проверяется одним запросом за запрос."""
+        return get_object_or_404(
+            Title.objects.only('id'), pk=self.kwargs.get('title_id')
+        )
 
-    def get_title(self):
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, pk=title_id)
+    def get_queryset(self):
+        return Review.objects.filter(title=self.title).select_related('author')
+
+    def get_object(self):
+        """У маршрута reviews/me/ объект — отзыв текущего пользователя."""
+        if self.action_map.get('put') != 'replace_own':
+            return super().get_object()
+        review = get_object_or_404(
+            self.get_queryset(), author_id=self.request.user.pk
+        )
+        self.check_object_permissions(self.request, review)
+        return review
+
+    def save_review(self, serializer, replace):
+        review, created = Review.objects.upsert(
+            title_id=self.title.pk,
+            author_id=self.request.user.pk,
+            replace=replace,
+            **serializer.validated_data
+        )
+        if review is not None:
+            review.author = self.request.user
+            serializer.instance = review
+        return created
 
     def perform_create(self, serializer):
-        try:
-            serializer.save(author=self.request.user, title=self.get_title())
-        except IntegrityError:
+        if not self.save_review(serializer, replace=False):
             raise serializers.ValidationError('Not unique!',)
 
-
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(
+        methods=['PUT'],
+        detail=False,
+        url_path='me',
+        http_method_names=['put', 'options'],
+    )
+    def replace_own(self, request, title_id=None):
+        """Создай или замени отзыв текущего пользователя одним запросом."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created = self.save_review(serializer, replace=True)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class CommentViewSet(ReplicaReadMixin, CachedListRetrieveMixin,
+                     viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
+    pagination_class = LimitOffsetOrCursorPagination
     serializer_class = CommentSerializer
     permission_classes = (IsAdminOrModeratorOrAuthor,)
+    cache_dependencies = (
+        (Comment, 'review_id'), (Review, 'title_id'), User
+    )
+
+    @cached_property
+    def review(self):
+        """Отзыв из адреса вместе с проверкой произведения, одним запросом.
+
+        Отзыв к другому произведению даёт 404, как и несуществующий.
+        """
+        return get_object_or_404(
+            Review.objects.only('id', 'title_id'),
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        return Comment.objects.filter(review=review_id)
-
-    def get_review(self):
-        review_id = self.kwargs.get('review_id')
-        return get_object_or_404(Review, pk=review_id)
+        return Comment.objects.filter(
+            review=self.review
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
+
+
+class MetricsView(APIView):
+    """Метрики всех воркеров в текстовом формате Prometheus."""
+
+    permission_classes = (IsAuthenticated, AdminOnly)
+
+    def get(self, request):
+        return HttpResponse(
+            metrics.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
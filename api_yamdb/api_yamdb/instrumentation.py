@@ -0,0 +1,274 @@
+"""Замер времени обработки запроса по частям: база, сериализация, рендеринг.
+
+Счётчики живут в контекстной переменной и заполняются только для
+запросов, попавших в выборку `RequestTimingMiddleware`; в остальных
+`timed` ничего не делает. Здесь же — запись медленных SQL-запросов
+с их планами выполнения.
+"""
+import json
+import logging
+import re
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from time import perf_counter
+
+from django.db import connections
+
+slow_query_logger = logging.getLogger('api.slow_queries')
+
+SPANS = ('db', 'serialize', 'render')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Счётчики одного запроса, время в миллисекундах."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.total = None
+        self.spans = dict.fromkeys(SPANS, 0.0)
+        self.queries = 0
+        self.accounted = 0.0
+        self.active = set()
+
+    def add(self, name, elapsed):
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed
+        self.accounted += elapsed
+
+    def finish(self):
+        self.total = (perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing."""
+        metrics = [
+            f'{name};dur={elapsed:.2f}'
+            for name, elapsed in self.spans.items()
+        ]
+        metrics[0] += f';desc="{self.queries} queries"'
+        metrics.append(f'total;dur={self.total:.2f}')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            **{
+                f'{name}_ms': round(elapsed, 3)
+                for name, elapsed in self.spans.items()
+            },
+            'total_ms': round(self.total, 3),
+        }
+
+
+def get_timings():
+    """Счётчики текущего запроса или None, если он не замеряется."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """Добавь время блока к счётчику name текущего запроса.
+
+    Время вложенных замеров (например, запросов к базе внутри
+    сериализатора) из блока вычитается, а вложенный блок с тем же
+    именем отдельно не считается.
+    """
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    accounted = timings.accounted
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (perf_counter() - started) * 1000
+        timings.active.discard(name)
+        timings.add(name, elapsed - (timings.accounted - accounted))
+
+
+class QueryTimer:
+    """Обёртка выполнения SQL: время и число запросов к базе."""
+
+    def __init__(self, timings):
+        self.timings = timings
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings.queries += 1
+            self.timings.add('db', (perf_counter() - started) * 1000)
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL: только число запросов."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def execute_wrappers(make_wrapper):
+    """Оберни выполнение SQL во всех подключениях.
+
+    make_wrapper(connection) возвращает обёртку для подключения.
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(make_wrapper(connection))
+            )
+        yield
+
+
+@contextmanager
+def collect_timings():
+    """Замеряй запрос: счётчики доступны через get_timings и timed."""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    timer = QueryTimer(timings)
+    try:
+        with execute_wrappers(lambda connection: timer):
+            yield timings
+    finally:
+        _current.reset(token)
+        if timings.total is None:
+            timings.finish()
+
+
+def fingerprint(sql):
+    """Приведи SQL к общему виду: без значений и длины списков IN."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def explain(connection, sql, params):
+    """Верни план выполнения запроса строками.
+
+    Запрос идёт мимо обёрток выполнения, поэтому не попадает
+    ни в счётчики запроса, ни снова в журнал медленных запросов.
+    """
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.cursor.fetchall()
+    except Exception as error:
+        return [f'План не получен: {error}']
+    if connection.vendor == 'sqlite':
+        return [row[-1] for row in rows]
+    return [' '.join(str(column) for column in row) for row in rows]
+
+
+class SlowQueryRecorder:
+    """Обёртка выполнения SQL: записывает запросы дольше порога.
+
+    Для каждого такого SELECT сохраняется план выполнения.
+    Время считается до возврата из execute, без чтения строк.
+    """
+
+    EXPLAINABLE = ('SELECT', 'WITH')
+
+    def __init__(self, connection, request, threshold, path):
+        self.connection = connection
+        self.request = request
+        self.threshold = threshold
+        self.path = path
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed = (perf_counter() - started) * 1000
+        if elapsed >= self.threshold:
+            self.record(sql, params, many, elapsed)
+        return result
+
+    def get_view(self):
+        match = self.request.resolver_match
+        if match is None:
+            return None, None
+        view_class = getattr(match.func, 'cls', None) or getattr(
+            match.func, 'view_class', None
+        )
+        return (
+            match.view_name,
+            view_class.__name__ if view_class else match.func.__name__
+        )
+
+    def record(self, sql, params, many, elapsed):
+        route, view = self.get_view()
+        plan = []
+        if not many and sql.lstrip().upper().startswith(self.EXPLAINABLE):
+            plan = explain(self.connection, sql, params)
+        entry = {
+            'time': datetime.now(timezone.utc).isoformat(),
+            'database': self.connection.alias,
+            'duration_ms': round(elapsed, 3),
+            'method': self.request.method,
+            'path': self.request.path,
+            'route': route,
+            'view': view,
+            'fingerprint': fingerprint(sql),
+            'sql': sql,
+            'params': None if many or params is None else list(params),
+            'plan': plan,
+        }
+        slow_query_logger.warning(
+            'Медленный запрос %.1f ms в %s',
+            elapsed,
+            view or self.request.path,
+            extra={'data': entry}
+        )
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(entry, ensure_ascii=False, default=str))
+            file.write('\n')
+
+
+@contextmanager
+def record_slow_queries(request, threshold, path):
+    """Записывай медленные запросы всех подключений в файл path."""
+    with execute_wrappers(
+        lambda connection: SlowQueryRecorder(
+            connection, request, threshold, path
+        )
+    ):
+        yield
+
+
+class JsonFormatter(logging.Formatter):
+    """Пишет запись журнала одной строкой JSON вместе с полями из extra."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **getattr(record, 'data', {}),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TimedSerializerMixin:
+    """Учитывает время сериализации и проверки данных в Server-Timing."""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+    def is_valid(self, raise_exception=False):
+        with timed('serialize'):
+            return super().is_valid(raise_exception=raise_exception)
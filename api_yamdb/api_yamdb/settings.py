@@ -35,6 +35,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.ProfilingMiddleware',
+    'api.middleware.SlowQueryMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.RequestTimingMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,13 +73,185 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# Профили соединений с SQLite. development — настройки Django
+# по умолчанию; production — журнал WAL (читатели не блокируют писателя),
+# synchronous=NORMAL, большие кэш и mmap, ожидание блокировки вместо
+# ошибки `database is locked` и соединения, живущие между запросами
+# в каждом потоке воркера. Сравнение — команда benchmark_sqlite.
+SQLITE_PROFILES = {
+    'development': {
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+    },
+    'production': {
+        'CONN_MAX_AGE': int(os.getenv('SQLITE_CONN_MAX_AGE', 600)),
+        'OPTIONS': {
+            'timeout': float(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join((
+                'PRAGMA journal_mode = WAL',
+                'PRAGMA synchronous = NORMAL',
+                'PRAGMA temp_store = MEMORY',
+                'PRAGMA mmap_size = {}'.format(
+                    int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 ** 2))
+                ),
+                # Отрицательное значение — размер в килобайтах.
+                'PRAGMA cache_size = {}'.format(
+                    int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024))
+                ),
+            )),
+        },
+    },
+}
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'development')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'api_yamdb.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **SQLITE_PROFILES[SQLITE_PROFILE],
     }
 }
 
+# Реплики для чтения каталога: пути к копиям базы через запятую.
+# Копии обновляются командой sync_replicas; безопасные запросы
+# к каталогу читают с них, остальные — с основной базы.
+DATABASE_REPLICAS = []
+for number, replica_path in enumerate(
+    filter(None, os.getenv('SQLITE_REPLICAS', '').split(',')), 1
+):
+    DATABASE_REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'NAME': replica_path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Сколько секунд реплики могут отставать: ответы по данным, изменённым
+# позже, при чтении с реплики не кэшируются.
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', 5))
+
+
+# Cache
+
+API_CACHE_ALIAS = 'api'
+
+API_CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Тела ответов могут жить в кэше каждого процесса (locmem): ключ
+# включает версии данных, и устаревшее тело после записи не найдётся.
+API_CACHE_BACKEND = os.getenv('API_CACHE_BACKEND', 'locmem')
+
+# Версии данных общие для всех воркеров: после записи ни один из них
+# не отдаст прежний ответ. Кэш не очищается вместе с кэшем ответов
+# и не вытесняет записи.
+API_GENERATIONS_CACHE_ALIAS = 'api_generations'
+
+# Список отзыва claims токенов: общий для всех воркеров, не вытесняет
+# записи и не очищается вместе с кэшем ответов.
+JWT_REVOCATION_CACHE = 'jwt_revocations'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    API_CACHE_ALIAS: {
+        'BACKEND': API_CACHE_BACKENDS[API_CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'API_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'api')
+        ),
+        'TIMEOUT': int(os.getenv('API_CACHE_TIMEOUT', 300)),
+    },
+    API_GENERATIONS_CACHE_ALIAS: {
+        'BACKEND': API_CACHE_BACKENDS['file'],
+        'LOCATION': os.getenv(
+            'API_GENERATIONS_CACHE_LOCATION',
+            str(BASE_DIR / 'cache' / 'generations')
+        ),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+    JWT_REVOCATION_CACHE: {
+        'BACKEND': API_CACHE_BACKENDS['file'],
+        'LOCATION': os.getenv(
+            'JWT_REVOCATION_CACHE_LOCATION',
+            str(BASE_DIR / 'cache' / 'revocations')
+        ),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+
+# Request timing, slow queries, metrics and profiling
+
+# Доля запросов, для которых замеряется время базы, сериализации
+# и рендеринга (журнал api.timing), по умолчанию 0 — ни одного.
+# Заголовок Server-Timing получают только администраторы или все при DEBUG.
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0)
+)
+
+# Запись медленных SQL-запросов с планами выполнения: включается
+# заданием порога в миллисекундах, 0 — записывать все запросы.
+SLOW_QUERY_THRESHOLD_MS = (
+    float(os.getenv('SLOW_QUERY_THRESHOLD_MS'))
+    if os.getenv('SLOW_QUERY_THRESHOLD_MS') else None
+)
+
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', str(BASE_DIR / 'slow_queries.jsonl')
+)
+
+# Каталог файлов метрик, общий для всех воркеров: сбор метрик
+# включается заданием каталога.
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+
+# Куда ProfilingMiddleware сохраняет профили запросов администраторов.
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'profiles'))
+
+# Сколько последних профилей хранить в PROFILE_DIR.
+PROFILE_MAX_COUNT = int(os.getenv('PROFILE_MAX_COUNT', 100))
+
+# Шаг выборки стеков для flamegraph в секундах. Поток выборки получает
+# GIL не чаще интервала переключения потоков (5 мс по умолчанию),
+# так что более частая выборка лишь нагружает процесс.
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'api_yamdb.instrumentation.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['json_console'],
+            'level': os.getenv('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'api.slow_queries': {
+            'handlers': ['json_console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 
@@ -115,12 +292,16 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.TimedJSONRenderer',
+        'api.renderers.TimedBrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
 }
@@ -149,3 +330,14 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 SERVER_EMAIL = EMAIL_HOST_USER
 
 EMAIL_ADMIN = EMAIL_HOST_USER
+
+# Очередь писем: команда send_emails забирает их порциями, неудачные
+# попытки повторяет через EMAIL_OUTBOX_BACKOFF, 2 * EMAIL_OUTBOX_BACKOFF, ...
+# секунд (не дольше EMAIL_OUTBOX_BACKOFF_MAX), но не больше
+# EMAIL_OUTBOX_MAX_ATTEMPTS раз. Забранное письмо другие воркеры
+# не трогают EMAIL_OUTBOX_LEASE секунд.
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+EMAIL_OUTBOX_BACKOFF = float(os.getenv('EMAIL_OUTBOX_BACKOFF', 30))
+EMAIL_OUTBOX_BACKOFF_MAX = float(os.getenv('EMAIL_OUTBOX_BACKOFF_MAX', 3600))
+EMAIL_OUTBOX_LEASE = float(os.getenv('EMAIL_OUTBOX_LEASE', 300))
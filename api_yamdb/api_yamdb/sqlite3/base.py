@@ -0,0 +1,48 @@
+"""SQLite с настройкой соединений через OPTIONS.
+
+Повторяет параметры, появившиеся в Django 5.1:
+
+- `init_command` — SQL через `;`, выполняется на каждом новом соединении
+  (здесь — PRAGMA журнала, кэша и mmap);
+- `transaction_mode` — режим BEGIN для `transaction.atomic`: с IMMEDIATE
+  транзакция сразу берёт блокировку записи и ждёт её `timeout` секунд,
+  а не падает с `database is locked` при попытке записи после чтения.
+
+После перехода на Django 5.1 движок можно заменить стандартным.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    init_command = None
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.init_command = params.pop('init_command', None)
+        transaction_mode = params.pop('transaction_mode', None)
+        if transaction_mode is not None:
+            transaction_mode = transaction_mode.upper()
+            if transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    'transaction_mode должен быть одним из: '
+                    + ', '.join(TRANSACTION_MODES)
+                )
+        self.transaction_mode = transaction_mode
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        if self.init_command:
+            for statement in self.init_command.split(';'):
+                if statement.strip():
+                    connection.execute(statement)
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
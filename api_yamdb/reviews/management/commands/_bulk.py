@@ -0,0 +1,53 @@
+"""Общие приёмы массовой записи для команд загрузки данных."""
+from itertools import islice
+
+from django.db import connections
+from django.utils import timezone
+
+
+def chunked(iterable, size):
+    """Разбей поток на списки длиной не больше size."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_rows(model, rows, using='default'):
+    """Вставь строки одним executemany, минуя создание объектов модели.
+
+    Значения готовятся полями модели, отсутствующие в строках поля
+    получают значения по умолчанию, сигналы не отправляются.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in rows[0] or not field.primary_key
+    ]
+    defaults = {
+        field.attname: (
+            timezone.now() if getattr(field, 'auto_now_add', False)
+            else field.get_default()
+        )
+        for field in fields if field.attname not in rows[0]
+    }
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields))
+    )
+    params = [
+        [
+            field.get_db_prep_save(
+                row.get(field.attname, defaults.get(field.attname)),
+                connection
+            )
+            for field in fields
+        ]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
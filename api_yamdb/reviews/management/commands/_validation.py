@@ -0,0 +1,104 @@
+"""Разбор и проверка строк CSV для load_data в отдельных процессах."""
+from collections import deque
+from hashlib import md5
+
+import django
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+
+
+def init_worker():
+    """Подготовь процесс пула к разбору строк."""
+    if not apps.ready:
+        django.setup()
+
+
+def related_labels(model):
+    """Верни метки моделей, на которые ссылаются внешние ключи модели."""
+    return {
+        field.related_model._meta.label_lower
+        for field in model._meta.concrete_fields
+        if field.is_relation
+    }
+
+
+def clean_value(field, raw):
+    if field.is_relation:
+        return field.target_field.to_python(raw)
+    if raw == '' and field.null:
+        return None
+    return field.clean(raw, None)
+
+
+def clean_chunk(chunk):
+    """Приведи типы и проверь порцию строк.
+
+    Принимает пару (метка модели, строки с номерами строк файла) и
+    возвращает номера и очищенные значения корректных строк и список
+    ошибок вида (номер строки, столбец, сообщение). Существование
+    связанных объектов проверяет check_relations в основном процессе.
+    """
+    model_label, rows = chunk
+    model = apps.get_model(model_label)
+    cleaned, errors = [], []
+    for line, row in rows:
+        values, row_errors = {}, []
+        for column, raw in row.items():
+            try:
+                field = model._meta.get_field(column)
+            except FieldDoesNotExist:
+                row_errors.append((line, column, 'Неизвестный столбец.'))
+                continue
+            try:
+                values[field.attname] = clean_value(field, raw)
+            except ValidationError as error:
+                row_errors.append((line, column, ' '.join(error.messages)))
+        if row_errors:
+            errors.extend(row_errors)
+        else:
+            cleaned.append((line, values))
+    return cleaned, errors
+
+
+def check_relations(model, cleaned, known_ids):
+    """Отбрось строки со ссылками на несуществующие объекты.
+
+    Возвращает значения остальных строк и ошибки для отброшенных.
+    """
+    relations = [
+        (field.attname, field.name, field.related_model._meta.label_lower)
+        for field in model._meta.concrete_fields
+        if field.is_relation
+    ]
+    valid, errors = [], []
+    for line, values in cleaned:
+        row_errors = [
+            (line, name, f'Объект {label} с id={values[attname]} '
+                         'не существует.')
+            for attname, name, label in relations
+            if attname in values
+            and values[attname] not in known_ids[label]
+        ]
+        if row_errors:
+            errors.extend(row_errors)
+        else:
+            valid.append(values)
+    return valid, errors
+
+
+def row_digest(values, columns):
+    """Хэш содержимого строки по указанным столбцам."""
+    return md5(
+        repr([values[column] for column in columns]).encode()
+    ).hexdigest()
+
+
+def ordered_map(executor, function, iterable, window):
+    """Как executor.map, но держит в работе не больше window порций."""
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,256 @@
+import csv
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.constants import MAX_RATE, MIN_RATE
+from reviews.management.commands._bulk import chunked, insert_rows
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import data_loaded
+from users.constsnts import ADMIN, MODERATOR, USER
+
+User = get_user_model()
+
+WORDS = (
+    'тень', 'город', 'ветер', 'последний', 'море', 'ночь', 'звезда',
+    'дорога', 'память', 'огонь', 'тишина', 'остров', 'время', 'зеркало',
+    'сад', 'история', 'песня', 'полёт', 'зима', 'легенда', 'свет', 'дом',
+    'небо', 'путь', 'сон', 'река', 'голос', 'мир', 'герой', 'тайна',
+)
+SCORE_WEIGHTS = (1, 1, 2, 3, 5, 8, 12, 16, 14, 10)
+ROLE_WEIGHTS = ((USER, 97), (MODERATOR, 2), (ADMIN, 1))
+# Фиксированная точка отсчёта: при одном seed данные совпадают побайтно.
+LAST_DATE = datetime(2024, 12, 31, tzinfo=timezone.utc)
+DATE_RANGE = timedelta(days=5 * 365)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует воспроизводимый набор данных заданного масштаба '
+        'в базу или в CSV-файлы для load_data.'
+    )
+
+    CHUNK_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help=(
+                'Показатель закона Ципфа для популярности произведений '
+                'и отзывов; 0 — равномерно.'
+            )
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Каталог для CSV-файлов; без него данные пишутся в базу.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=self.CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.output = options['output']
+        self.chunk_size = options['chunk_size']
+        self.skew = options['skew']
+        if self.output:
+            os.makedirs(self.output, exist_ok=True)
+
+        users = self.write(
+            '1.customuser', User, self.generate_users, options['users']
+        )
+        categories = self.write(
+            '2.category', Category, self.generate_categories,
+            options['categories']
+        )
+        genres = self.write(
+            '3.genre', Genre, self.generate_genres, options['genres']
+        )
+        titles = self.write(
+            '4.title', Title, self.generate_titles, options['titles'],
+            categories
+        )
+        self.write(
+            '5.title_genre', Title.genre.through, self.generate_title_genres,
+            len(titles), titles, genres
+        )
+        reviews = self.write(
+            '6.review', Review, self.generate_reviews, options['reviews'],
+            titles, users
+        )
+        self.write(
+            '7.comment', Comment, self.generate_comments, options['comments'],
+            reviews, users
+        )
+        if not self.output:
+            Title.objects.recount_rating()
+            data_loaded.send(sender=self.__class__)
+
+    def first_id(self, model):
+        if self.output:
+            return 1
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def write(self, filename, model, generate, count, *related):
+        """Сгенерируй count строк и запиши их в CSV или в базу.
+
+        Возвращает диапазон id созданных объектов.
+        """
+        first_id = self.first_id(model)
+        ids = range(first_id, first_id + count)
+        rows = generate(ids, *related)
+        started = monotonic()
+        written = 0
+        if self.output:
+            path = os.path.join(self.output, f'{filename}.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                writer = None
+                for row in rows:
+                    if writer is None:
+                        writer = csv.DictWriter(file, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+                    written += 1
+        else:
+            with transaction.atomic():
+                for chunk in chunked(rows, self.chunk_size):
+                    insert_rows(model, chunk)
+                    written += len(chunk)
+        elapsed = max(monotonic() - started, 1e-6)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{model.__name__}: {written} строк, '
+                f'{written / elapsed:.0f} строк/с.'
+            )
+        )
+        return range(first_id, first_id + written)
+
+    def popularity(self, count):
+        """Верни веса по закону Ципфа для count объектов."""
+        return [1 / rank ** self.skew for rank in range(1, count + 1)]
+
+    def review_counts(self, total, titles, users):
+        """Распредели total отзывов по titles произведениям по Ципфу.
+
+        На произведение приходится не больше users отзывов, излишек
+        достаётся следующим по популярности.
+        """
+        weights = self.popularity(titles)
+        scale = total / sum(weights)
+        counts = [min(users, int(weight * scale)) for weight in weights]
+        deficit = min(total, titles * users) - sum(counts)
+        for position, count in enumerate(counts):
+            if deficit <= 0:
+                break
+            extra = min(users - count, deficit)
+            counts[position] += extra
+            deficit -= extra
+        return counts
+
+    def pick_skewed(self, ids):
+        """Выбери id, чаще первые: приближение закона Ципфа."""
+        position = int(len(ids) * self.random.random() ** (1 + self.skew))
+        return ids[min(position, len(ids) - 1)]
+
+    def text(self, min_words, max_words):
+        return ' '.join(
+            self.random.choices(
+                WORDS, k=self.random.randint(min_words, max_words)
+            )
+        ).capitalize()
+
+    def pub_date(self):
+        return LAST_DATE - DATE_RANGE * self.random.random()
+
+    def generate_users(self, ids):
+        roles, weights = zip(*ROLE_WEIGHTS)
+        for pk in ids:
+            yield {
+                'id': pk,
+                'username': f'user_{pk}',
+                'email': f'user_{pk}@yamdb.fake',
+                'role': self.random.choices(roles, weights)[0],
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def generate_categories(self, ids):
+        for pk in ids:
+            yield {
+                'id': pk, 'name': f'Категория {pk}', 'slug': f'category-{pk}'
+            }
+
+    def generate_genres(self, ids):
+        for pk in ids:
+            yield {'id': pk, 'name': f'Жанр {pk}', 'slug': f'genre-{pk}'}
+
+    def generate_titles(self, ids, categories):
+        for pk in ids:
+            yield {
+                'id': pk,
+                'name': self.text(1, 4),
+                'year': self.random.randint(1900, LAST_DATE.year),
+                'description': self.text(5, 25),
+                'category_id': self.random.choice(categories),
+            }
+
+    def generate_title_genres(self, ids, titles, genres):
+        pk = iter(ids.start + offset for offset in range(len(titles) * 3))
+        for title_id in titles:
+            count = min(len(genres), self.random.randint(1, 3))
+            for genre_id in self.random.sample(genres, count):
+                yield {
+                    'id': next(pk), 'title_id': title_id, 'genre_id': genre_id
+                }
+
+    def generate_reviews(self, ids, titles, users):
+        """Отзывы по произведениям с популярностью по закону Ципфа.
+
+        Автор оставляет не больше одного отзыва на произведение.
+        """
+        if not titles or not users:
+            return
+        order = list(titles)
+        self.random.shuffle(order)
+        counts = self.review_counts(len(ids), len(order), len(users))
+        pk = iter(ids)
+        scores = range(MIN_RATE, MAX_RATE + 1)
+        for title_id, count in zip(order, counts):
+            for author_id in self.random.sample(users, count):
+                yield {
+                    'id': next(pk),
+                    'title_id': title_id,
+                    'text': self.text(5, 40),
+                    'author_id': author_id,
+                    'score': self.random.choices(scores, SCORE_WEIGHTS)[0],
+                    'pub_date': self.pub_date(),
+                }
+
+    def generate_comments(self, ids, reviews, users):
+        if not reviews or not users:
+            return
+        for pk in ids:
+            yield {
+                'id': pk,
+                'review_id': self.pick_skewed(reviews),
+                'text': self.text(3, 20),
+                'author_id': self.random.choice(users),
+                'pub_date': self.pub_date(),
+            }
@@ -1,17 +1,69 @@
 import csv
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from time import monotonic
 
 from django.apps import apps
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.management.commands._bulk import chunked, insert_rows
+from reviews.management.commands._validation import (check_relations,
+                                                     clean_chunk,
+                                                     init_worker,
+                                                     ordered_map,
+                                                     related_labels,
+                                                     row_digest)
+from reviews.signals import data_loaded
 
 
 class Command(BaseCommand):
+    help = (
+        'Загружает данные из CSV-файлов вида <номер>.<модель>.csv '
+        'в порядке номеров.'
+    )
 
     APP_NAME = 'reviews'
     USERS_APP_NAME = 'users'
+    CHUNK_SIZE = 1000
 
     def add_arguments(self, parser):
         parser.add_argument('path_to_files', type=str)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=self.CHUNK_SIZE,
+            help='Сколько строк читать и вставлять за раз.'
+        )
+        parser.add_argument(
+            '--atomic',
+            action='store_true',
+            help='Загрузить все файлы в одной транзакции.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help=(
+                'Число процессов для разбора и проверки строк; '
+                '0 — загружать строки как есть, без проверки.'
+            )
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help=(
+                'Добавить новые строки и обновить изменённые, '
+                'не трогая совпадающие с базой.'
+            )
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только проверить файлы и вывести все ошибки.'
+        )
 
     def determine_model(self, filename):
         _, model_name, _ = filename.split('.')
@@ -24,20 +76,257 @@ class Command(BaseCommand):
             model_class = apps.get_model(app_name, model_name)
             return model_class
         except LookupError:
-            print(f"Model '{model_name}' not found in app '{app_name}'")
+            self.stderr.write(
+                f"Model '{model_name}' not found in app '{app_name}'"
+            )
             return None
 
+    @staticmethod
+    def get_filenames(path):
+        """Верни CSV-файлы каталога в порядке числовых префиксов."""
+        filenames = [
+            filename for filename in os.listdir(path)
+            if filename.endswith('.csv')
+        ]
+        return sorted(
+            filenames, key=lambda filename: int(filename.split('.')[0])
+        )
+
+    @staticmethod
+    def read_chunks(file, chunk_size):
+        """Читай CSV-файл порциями, не загружая его целиком.
+
+        Возвращает порции пар (номер строки файла, где начинается
+        запись, запись): reader.line_num учитывает заголовок и значения
+        в кавычках, занимающие несколько строк.
+        """
+        reader = csv.DictReader(file)
+        if reader.fieldnames is None:
+            return
+        line = reader.line_num + 1
+        rows = []
+        for row in reader:
+            rows.append((line, row))
+            line = reader.line_num + 1
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+    def get_known_ids(self, label):
+        """id объектов модели: уже сохранённые и прочитанные из файлов."""
+        if label not in self.known_ids:
+            self.known_ids[label] = set(
+                apps.get_model(label).objects.values_list('pk', flat=True)
+            )
+        return self.known_ids[label]
+
+    def clean_chunks(self, model_class, chunks):
+        """Проверь порции строк в пуле процессов, сохраняя их порядок."""
+        label = model_class._meta.label
+        tasks = ((label, rows) for rows in chunks)
+        if self.executor is None:
+            return map(clean_chunk, tasks)
+        return ordered_map(
+            self.executor, clean_chunk, tasks, self.workers * 2
+        )
+
+    def iter_rows(self, model_class, file, filename, chunk_size):
+        """Отдавай порции значений для вставки, собирая ошибки проверки."""
+        chunks = self.read_chunks(file, chunk_size)
+        if not self.validate:
+            for rows in chunks:
+                yield [row for _, row in rows]
+            return
+        label = model_class._meta.label_lower
+        known_ids = {
+            related: self.get_known_ids(related)
+            for related in related_labels(model_class)
+        }
+        for cleaned, errors in self.clean_chunks(model_class, chunks):
+            cleaned, relation_errors = check_relations(
+                model_class, cleaned, known_ids
+            )
+            self.errors.extend(
+                (filename, line, column, message)
+                for line, column, message in sorted(
+                    errors + relation_errors, key=lambda error: error[0]
+                )
+            )
+            self.get_known_ids(label).update(
+                values['id'] for values in cleaned if 'id' in values
+            )
+            yield cleaned
+
+    def load_file(self, path, chunk_size):
+        filename = os.path.basename(path)
+        model_class = self.determine_model(filename)
+        if model_class is None:
+            return
+        started = monotonic()
+        with open(path, 'r', encoding='utf-8') as file:
+            with transaction.atomic():
+                count = self.load_rows(
+                    model_class, file, filename, chunk_size
+                )
+        elapsed = max(monotonic() - started, 1e-6)
+        action = 'проверены' if self.dry_run else 'загружены'
+        summary = ''
+        if self.upsert and not self.dry_run:
+            summary = (
+                f' (новых {self.upsert_counts.pop("created", 0)}, '
+                f'изменено {self.upsert_counts.pop("updated", 0)}, '
+                f'без изменений {self.upsert_counts.pop("unchanged", 0)})'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Данные для "{model_class.__name__}" {action}: '
+                f'{count} строк{summary}, {count / elapsed:.0f} строк/с.'
+            )
+        )
+
+    def load_rows(self, model_class, file, filename, chunk_size):
+        """Запиши строки файла в базу и верни их количество."""
+        count = 0
+        errors_before = len(self.errors)
+        for rows in self.iter_rows(
+            model_class, file, filename, chunk_size
+        ):
+            count += len(rows)
+            if self.dry_run or len(self.errors) > errors_before:
+                continue
+            if self.upsert:
+                self.upsert_rows(model_class, rows, chunk_size)
+                continue
+            self.create_rows(model_class, rows, chunk_size)
+        if len(self.errors) > errors_before and not self.dry_run:
+            self.report_errors()
+            raise CommandError(
+                f'Файл {filename} не загружен: найдены ошибки.'
+            )
+        if model_class.__name__ == 'Review' and not self.dry_run:
+            apps.get_model(
+                self.APP_NAME, 'title'
+            ).objects.recount_rating()
+        return count
+
+    @staticmethod
+    def create_rows(model_class, rows, batch_size):
+        """Вставь строки, сохранив даты из файла в полях auto_now_add.
+
+        bulk_create записал бы в такие поля текущее время, поэтому
+        строки с ними вставляются через insert_rows.
+        """
+        if not rows:
+            return
+        fields = [model_class._meta.get_field(column) for column in rows[0]]
+        if not any(getattr(field, 'auto_now_add', False) for field in fields):
+            model_class.objects.bulk_create(
+                [model_class(**row) for row in rows], batch_size=batch_size
+            )
+            return
+        for chunk in chunked(rows, batch_size):
+            insert_rows(model_class, [
+                {field.attname: value
+                 for field, value in zip(fields, row.values())}
+                for row in chunk
+            ])
+
+    def upsert_rows(self, model_class, rows, batch_size):
+        """Вставь новые строки и обнови изменённые.
+
+        Строки сравниваются с базой по хэшу содержимого, совпадающие
+        пропускаются. Связи многие-ко-многим сверяются по паре
+        внешних ключей, а не по id.
+        """
+        if model_class._meta.auto_created:
+            self.upsert_links(model_class, rows, batch_size)
+            return
+        if any('id' not in row for row in rows):
+            raise CommandError(
+                f'Для обновления {model_class.__name__} нужен столбец id.'
+            )
+        columns = list(rows[0])
+        saved = {
+            values['id']: row_digest(values, columns)
+            for values in model_class.objects.filter(
+                pk__in=[row['id'] for row in rows]
+            ).values(*columns)
+        }
+        new, changed = [], []
+        for row in rows:
+            if row['id'] not in saved:
+                new.append(row)
+            elif saved[row['id']] != row_digest(row, columns):
+                changed.append(model_class(**row))
+        self.create_rows(model_class, new, batch_size)
+        update_fields = [column for column in columns if column != 'id']
+        if changed and update_fields:
+            model_class.objects.bulk_update(
+                changed,
+                [model_class._meta.get_field(c).name for c in update_fields],
+                batch_size=batch_size
+            )
+        self.upsert_counts.update(
+            created=len(new),
+            updated=len(changed),
+            unchanged=len(rows) - len(new) - len(changed)
+        )
+
+    def upsert_links(self, model_class, rows, batch_size):
+        source, target = [
+            field.attname for field in model_class._meta.concrete_fields
+            if field.is_relation
+        ]
+        saved = set(
+            model_class.objects.filter(
+                **{f'{source}__in': {row[source] for row in rows}}
+            ).values_list(source, target)
+        )
+        new = []
+        for row in rows:
+            link = (row[source], row[target])
+            if link not in saved:
+                saved.add(link)
+                new.append(model_class(**{source: link[0], target: link[1]}))
+        model_class.objects.bulk_create(new, batch_size=batch_size)
+        self.upsert_counts.update(
+            created=len(new), unchanged=len(rows) - len(new)
+        )
+
+    def report_errors(self):
+        for filename, line, column, message in self.errors:
+            self.stderr.write(f'{filename}:{line}: {column}: {message}')
+
     def handle(self, *args, **options):
         path = options['path_to_files']
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size должен быть больше нуля.')
+        if options['workers'] < 0:
+            raise CommandError('--workers не может быть отрицательным.')
+        self.workers = options['workers']
+        self.dry_run = options['dry_run']
+        self.upsert = options['upsert']
+        self.validate = self.dry_run or self.upsert or self.workers > 0
+        self.known_ids = {}
+        self.errors = []
+        self.upsert_counts = Counter()
 
-        for filename in os.listdir(path):
-            with open(path + filename, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                class_instance = self.determine_model(filename)
-                data = [class_instance(**row) for row in reader]
-                class_instance.objects.bulk_create(data)
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Данные для "{class_instance.__name__}" загружены!'
-                    )
-                )
+        load_context = (
+            transaction.atomic() if options['atomic'] else nullcontext()
+        )
+        pool = (
+            ProcessPoolExecutor(self.workers, initializer=init_worker)
+            if self.validate and self.workers else nullcontext()
+        )
+        with pool as self.executor, load_context:
+            for filename in self.get_filenames(path):
+                self.load_file(os.path.join(path, filename), chunk_size)
+        if self.dry_run:
+            self.report_errors()
+            if self.errors:
+                raise CommandError(f'Найдено ошибок: {len(self.errors)}.')
+            return
+        data_loaded.send(sender=self.__class__)
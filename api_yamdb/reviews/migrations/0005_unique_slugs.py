@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 17:53
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def deduplicate_slugs(apps, schema_editor):
+    """Переименуй повторы slug перед добавлением уникальности.
+
+    Первый объект сохраняет slug, к остальным добавляется их id
+    (`rock`, `rock-17`); связи с произведениями не меняются.
+    """
+    for model_name in ('Category', 'Genre'):
+        model = apps.get_model('reviews', model_name)
+        manager = model.objects.using(schema_editor.connection.alias)
+        max_length = model._meta.get_field('slug').max_length
+        duplicates = manager.order_by().values('slug').annotate(
+            total=Count('id')
+        ).filter(total__gt=1).values_list('slug', flat=True)
+        taken = set(manager.values_list('slug', flat=True))
+        for slug in list(duplicates):
+            for obj in manager.filter(slug=slug).order_by('id')[1:]:
+                suffix, number = f'-{obj.id}', 0
+                new_slug = slug[:max_length - len(suffix)] + suffix
+                while new_slug in taken:
+                    number += 1
+                    suffix = f'-{obj.id}-{number}'
+                    new_slug = slug[:max_length - len(suffix)] + suffix
+                taken.add(new_slug)
+                manager.filter(id=obj.id).update(slug=new_slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(unique=True, verbose_name='Идентификатор'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='slug',
+            field=models.SlugField(unique=True, verbose_name='Идентификатор'),
+        ),
+    ]
@@ -1,4 +1,12 @@
-from django.db import models
+import re
+
+from django.db import connections, models, router, transaction
+from django.db.models import (Avg, Count, F, FloatField, OuterRef, Q,
+                              Subquery, Sum)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db.models.signals import post_save
+from django.utils import timezone
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth import get_user_model
 
@@ -17,7 +25,11 @@ User = get_user_model()
 class Category(models.Model):
 
     name = models.CharField(max_length=NAME, verbose_name='Название')
-    slug = models.SlugField(max_length=SLUG, verbose_name='Идентификатор')
+    slug = models.SlugField(
+        max_length=SLUG,
+        unique=True,
+        verbose_name='Идентификатор'
+    )
 
     class Meta:
         ordering = ('name',)
@@ -31,7 +43,11 @@ class Category(models.Model):
 class Genre(models.Model):
 
     name = models.CharField(max_length=NAME, verbose_name='Название')
-    slug = models.SlugField(max_length=SLUG, verbose_name='Идентификатор')
+    slug = models.SlugField(
+        max_length=SLUG,
+        unique=True,
+        verbose_name='Идентификатор'
+    )
 
     class Meta:
         ordering = ('name',)
@@ -42,15 +58,101 @@ class Genre(models.Model):
         return self.name
 
 
+TITLE_FTS_TABLE = 'reviews_title_fts'
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def apply_score_delta(self, title_id, score_delta, count_delta):
+        """Сдвинь сумму и число оценок произведения и пересчитай рейтинг."""
+        new_sum = F('score_sum') + score_delta
+        new_count = F('score_count') + count_delta
+        return self.filter(pk=title_id).update(
+            score_sum=new_sum,
+            score_count=new_count,
+            rating=Cast(new_sum, FloatField()) / NullIf(new_count, 0),
+        )
+
+    def recount_rating(self):
+        """Пересчитай рейтинг по отзывам (после массовой загрузки)."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            score_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(average=Avg('score')).values('average')
+            ),
+        )
+
+    def search(self, query, fields=('name', 'description')):
+        """Найди произведения по началам слов, лучшие совпадения первыми.
+
+        На SQLite запрос идёт в полнотекстовый индекс reviews_title_fts
+        (совпадение в названии весит больше, чем в описании),
+        на остальных СУБД — через icontains по каждому слову.
+        """
+        words = re.findall(r'\w+', query)
+        if not words:
+            return self.none()
+        if connections[self.db].vendor != 'sqlite':
+            condition = Q()
+            for word in words:
+                word_condition = Q()
+                for field in fields:
+                    word_condition |= Q(**{f'{field}__icontains': word})
+                condition &= word_condition
+            return self.filter(condition)
+        match = '{%s} : (%s)' % (
+            ' '.join(fields), ' '.join(f'"{word}"*' for word in words)
+        )
+        if TITLE_FTS_TABLE in self.query.extra_tables:
+            # Индекс уже присоединён другим поиском: второй MATCH
+            # к той же таблице FTS5 не поддерживает, поэтому подзапрос.
+            return self.filter(id__in=RawSQL(
+                f'SELECT rowid FROM {TITLE_FTS_TABLE} '
+                f'WHERE {TITLE_FTS_TABLE} MATCH %s',
+                (match,)
+            ))
+        # Индекс присоединяется один раз: и отбор, и ранг берутся
+        # из того же прохода по MATCH.
+        return self.extra(
+            select={'search_rank': f'bm25({TITLE_FTS_TABLE}, 10.0, 1.0)'},
+            tables=[TITLE_FTS_TABLE],
+            where=[
+                f'{TITLE_FTS_TABLE}.rowid = reviews_title.id',
+                f'{TITLE_FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+        ).order_by('search_rank', 'name')
+
+
 class Title(models.Model):
 
     name = models.CharField(max_length=NAME, verbose_name='Название')
     year = models.IntegerField(verbose_name='Год')
-    rating = models.IntegerField(
+    rating = models.FloatField(
         blank=False,
         null=True,
         verbose_name='Рейтинг'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    score_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
     description = models.CharField(
         max_length=DESCRIPTION,
         blank=True,
@@ -63,6 +165,8 @@ class Title(models.Model):
         verbose_name='Категория'
     )
 
+    objects = TitleQuerySet.as_manager()
+
     class Meta:
         ordering = ('name',)
         verbose_name = 'произведение'
@@ -72,6 +176,87 @@ class Title(models.Model):
         return self.name
 
 
+def supports_upsert_returning(connection):
+    """Есть ли INSERT ... ON CONFLICT ... RETURNING: в SQLite с 3.35."""
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return connection.vendor == 'postgresql'
+
+
+class ReviewQuerySet(models.QuerySet):
+
+    def upsert(self, title_id, author_id, text, score, replace=True):
+        """Создай отзыв автора к произведению или замени его одним запросом.
+
+        INSERT ... ON CONFLICT по unique_review_per_title_for_user не
+        роняет запрос с IntegrityError. С replace=False существующий отзыв
+        не меняется. Возвращает (отзыв или None, создан ли отзыв).
+        Как и save(), отправляет post_save: по прежней оценке, прочитанной
+        в той же транзакции, рейтинг сдвигается без пересчёта.
+        """
+        alias = router.db_for_write(self.model)
+        connection = connections[alias]
+        if not supports_upsert_returning(connection):
+            review, created = self.using(alias).get_or_create(
+                title_id=title_id,
+                author_id=author_id,
+                defaults={'text': text, 'score': score}
+            )
+            if not created and replace:
+                review.text, review.score = text, score
+                review.save()
+            return (review if created or replace else None), created
+        opts = self.model._meta
+        quote = connection.ops.quote_name
+        title, author, text_column, score_column, pub_date = (
+            quote(opts.get_field(name).column)
+            for name in ('title', 'author', 'text', 'score', 'pub_date')
+        )
+        action = (
+            f'DO UPDATE SET {text_column} = excluded.{text_column}, '
+            f'{score_column} = excluded.{score_column}'
+            if replace else 'DO NOTHING'
+        )
+        returning = 'RETURNING *'
+        if connection.vendor == 'postgresql':
+            # У строки, вставленной этим запросом, xmax равен нулю.
+            returning += ', (xmax = 0) AS inserted'
+        with transaction.atomic(using=alias):
+            previous = None
+            if replace:
+                # Без замены строка возвращается, только если вставлена.
+                existing = self.using(alias).filter(
+                    title_id=title_id, author_id=author_id
+                )
+                if connection.features.has_select_for_update:
+                    existing = existing.select_for_update()
+                previous = existing.values_list('score', flat=True).first()
+            review = self.first_raw(
+                f'INSERT INTO {quote(opts.db_table)} '
+                f'({title}, {author}, {text_column}, {score_column}, '
+                f'{pub_date}) VALUES (%s, %s, %s, %s, %s) '
+                f'ON CONFLICT ({title}, {author}) {action} {returning}',
+                (title_id, author_id, text, score,
+                 connection.ops.adapt_datetimefield_value(timezone.now())),
+                alias
+            )
+            if review is None:
+                return None, False
+            created = getattr(review, 'inserted', previous is None)
+            # Прежняя оценка для сдвига рейтинга в post_save. Если отзыв
+            # вставили параллельно после чтения, она неизвестна,
+            # и рейтинг пересчитается.
+            review._saved_score = previous
+            post_save.send(
+                sender=self.model, instance=review, created=created,
+                update_fields=None, raw=False, using=alias
+            )
+        return review, created
+
+    def first_raw(self, sql, params, alias):
+        return next(iter(self.raw(sql, params, using=alias)), None)
+
+
 class Review(models.Model):
 
     title = models.ForeignKey(
@@ -106,6 +291,8 @@ class Review(models.Model):
         verbose_name='Дата публикации'
     )
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -113,6 +300,12 @@ class Review(models.Model):
                 name='unique_review_per_title_for_user'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            )
+        ]
         verbose_name = 'отзыв'
         verbose_name_plural = 'Отзывы'
 
@@ -122,6 +315,22 @@ class Review(models.Model):
             f'\nВы оставили отзыв на произведение {self.title}.'
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_score()
+        return instance
+
+    def remember_score(self):
+        """Запомни сохранённые оценку и произведение для пересчёта рейтинга."""
+        score = self.__dict__.get('score')
+        self._saved_score = None if score is None else int(score)
+        self._saved_title_id = self.__dict__.get('title_id')
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
 
@@ -145,6 +354,12 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            )
+        ]
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
 
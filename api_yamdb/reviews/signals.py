@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from reviews.models import Review, Title
+
+# Отправляется после массовой загрузки данных в обход сигналов моделей.
+data_loaded = Signal()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    """Учти новую или изменённую оценку в рейтинге произведения."""
+    saved_score = getattr(instance, '_saved_score', None)
+    saved_title_id = getattr(instance, '_saved_title_id', None)
+    score = int(instance.score)
+    if created:
+        Title.objects.apply_score_delta(instance.title_id, score, 1)
+    elif saved_score is None or saved_title_id is None:
+        Title.objects.filter(pk=instance.title_id).recount_rating()
+    elif saved_title_id != instance.title_id:
+        Title.objects.apply_score_delta(saved_title_id, -saved_score, -1)
+        Title.objects.apply_score_delta(instance.title_id, score, 1)
+    elif saved_score != score:
+        Title.objects.apply_score_delta(
+            instance.title_id, score - saved_score, 0
+        )
+    instance.remember_score()
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключи оценку удалённого отзыва из рейтинга произведения."""
+    score = getattr(instance, '_saved_score', None)
+    title_id = getattr(instance, '_saved_title_id', None)
+    if score is None or title_id is None:
+        score, title_id = int(instance.score), instance.title_id
+    Title.objects.apply_score_delta(title_id, -score, -1)
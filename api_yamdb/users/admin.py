@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
+from users.models import OutgoingEmail
+
 User = get_user_model()
 
 
@@ -12,3 +14,14 @@ class UserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'to', 'subject', 'status', 'attempts', 'next_attempt_at'
+    )
+    list_filter = ('status',)
+    search_fields = ('to',)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
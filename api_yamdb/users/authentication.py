@@ -0,0 +1,38 @@
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from users.constsnts import CLAIM_FIELDS
+from users.tokens import claims_revoked
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к таблице пользователей.
+
+    Пользователь собирается из claims токена как модель с отложенными
+    полями: остальные поля загрузятся одним запросом при первом
+    обращении к любому из них. Токены без claims и с отозванными claims
+    проверяются по базе, как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if (
+            any(claim not in validated_token for claim in CLAIM_FIELDS)
+            or claims_revoked(validated_token)
+        ):
+            return super().get_user(validated_token)
+        claims = {
+            claim: validated_token[claim] for claim in CLAIM_FIELDS
+        }
+        claims[api_settings.USER_ID_FIELD] = (
+            validated_token[api_settings.USER_ID_CLAIM]
+        )
+        claims['is_active'] = True
+        # from_db ждёт значения в порядке полей модели.
+        fields = [
+            field.attname for field in self.user_model._meta.concrete_fields
+            if field.attname in claims
+        ]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, fields, [claims[field] for field in fields]
+        )
@@ -14,3 +14,17 @@ ROLE_CHOICES = [
     (ADMIN, ADMIN),
     (MODERATOR, MODERATOR),
 ]
+
+# Поля пользователя, которые копируются в claims токена доступа.
+CLAIM_FIELDS = ('username', 'role', 'is_staff', 'is_superuser')
+
+EMAIL_SUBJECT = 255
+EMAIL_PENDING = 'pending'
+EMAIL_SENT = 'sent'
+EMAIL_FAILED = 'failed'
+
+EMAIL_STATUS_CHOICES = [
+    (EMAIL_PENDING, EMAIL_PENDING),
+    (EMAIL_SENT, EMAIL_SENT),
+    (EMAIL_FAILED, EMAIL_FAILED),
+]
@@ -0,0 +1,97 @@
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from api.metrics import EMAIL_DURATION, EMAIL_OUTBOX
+from users.constsnts import EMAIL_FAILED
+from users.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди порциями через одно соединение '
+        'с почтовым сервером; неудачные попытки повторяются с растущей '
+        'паузой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Сколько писем забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новых писем.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста (с --loop).'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            messages = OutgoingEmail.objects.claim(
+                options['batch_size'], settings.EMAIL_OUTBOX_LEASE
+            )
+            if messages:
+                self.send_batch(messages)
+            elif options['loop']:
+                sleep(options['interval'])
+            else:
+                return
+
+    def send_batch(self, messages):
+        sent = []
+        connection = get_connection()
+        try:
+            for message in messages:
+                status = 'error'
+                started = perf_counter()
+                try:
+                    # Открывает соединение, если его ещё нет или оно
+                    # было закрыто после ошибки.
+                    connection.open()
+                    EmailMessage(
+                        subject=message.subject,
+                        body=message.body,
+                        to=[message.to],
+                        connection=connection
+                    ).send()
+                    status = 'ok'
+                except Exception as error:
+                    self.retry(message, error)
+                    connection.close()
+                else:
+                    sent.append(message.pk)
+                finally:
+                    EMAIL_DURATION.observe(
+                        perf_counter() - started, status=status
+                    )
+        finally:
+            connection.close()
+            OutgoingEmail.objects.filter(pk__in=sent).mark_sent()
+        EMAIL_OUTBOX.inc(len(sent), result='sent')
+        self.stdout.write(
+            f'Отправлено {len(sent)} из {len(messages)} писем.'
+        )
+
+    def retry(self, message, error):
+        message.schedule_retry(
+            error,
+            settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            settings.EMAIL_OUTBOX_BACKOFF,
+            settings.EMAIL_OUTBOX_BACKOFF_MAX
+        )
+        result = 'failed' if message.status == EMAIL_FAILED else 'retry'
+        EMAIL_OUTBOX.inc(result=result)
+        self.stderr.write(
+            f'Письмо {message.pk} для {message.to}: {error} '
+            f'(попытка {message.attempts}, {result}).'
+        )
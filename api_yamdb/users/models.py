@@ -1,5 +1,9 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from datetime import timedelta
+from uuid import uuid4
+
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import connections, models, transaction
+from django.utils import timezone
 
 from users.constsnts import (
     USERNAME,
@@ -11,8 +15,40 @@ from users.constsnts import (
     ADMIN,
     MODERATOR,
     CONFIRMATION_CODE_LENGTH,
-    ROLE_CHOICES
+    ROLE_CHOICES,
+    CLAIM_FIELDS,
+    EMAIL_SUBJECT,
+    EMAIL_PENDING,
+    EMAIL_SENT,
+    EMAIL_FAILED,
+    EMAIL_STATUS_CHOICES
 )
+from users.tokens import revoke_claims
+
+# Изменение этих полей отзывает claims выданных токенов.
+RIGHTS_FIELDS = (*CLAIM_FIELDS, 'is_active')
+
+
+class CustomUserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Отзови claims токенов, если UPDATE меняет права.
+
+        При update() сигнал post_save не отправляется, поэтому
+        затронутые пользователи собираются до изменения.
+        """
+        if not set(RIGHTS_FIELDS).intersection(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            user_ids = list(self.values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+        for user_id in user_ids:
+            revoke_claims(user_id)
+        return updated
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    pass
 
 
 class CustomUser(AbstractUser):
@@ -58,6 +94,8 @@ class CustomUser(AbstractUser):
         verbose_name='Код подтверждения'
     )
 
+    objects = CustomUserManager()
+
     @property
     def is_admin(self):
         """Является ли пользователь администратором или суперпользователем"""
@@ -68,6 +106,33 @@ class CustomUser(AbstractUser):
         """Является ли пользователь модератором"""
         return self.role == MODERATOR
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_claims()
+        return instance
+
+    def remember_claims(self):
+        """Запомни сохранённые права, чтобы заметить их изменение."""
+        self._saved_claims = tuple(
+            self.__dict__.get(field) for field in RIGHTS_FIELDS
+        )
+
+    def claims_changed(self):
+        saved = getattr(self, '_saved_claims', None)
+        return saved is None or any(
+            field in self.__dict__ and self.__dict__[field] != value
+            for field, value in zip(RIGHTS_FIELDS, saved)
+        )
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            # Обращение к отложенному полю (например, у пользователя
+            # из токена): загрузи все отложенные поля одним запросом.
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields)
+
     class Meta:
         ordering = ('id',)
         verbose_name = 'пользователь'
@@ -75,3 +140,105 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+
+    def due(self, now=None):
+        """Письма, которые пора отправить."""
+        return self.filter(
+            status=EMAIL_PENDING,
+            next_attempt_at__lte=now or timezone.now()
+        )
+
+    def claim(self, limit, lease):
+        """Забери до limit писем к отправке на lease секунд.
+
+        Письма помечаются меткой воркера и откладываются на время
+        аренды: другие воркеры их не возьмут, а если воркер упадёт,
+        письма снова станут доступны после её окончания. Условия
+        из due() повторяются во внешнем UPDATE: строку, которую успел
+        забрать другой воркер, база перепроверит и пропустит. Где
+        можно, строки ещё и блокируются с SKIP LOCKED, чтобы воркеры
+        не ждали друг друга.
+        """
+        now = timezone.now()
+        token = uuid4().hex
+        due = self.due(now).order_by('next_attempt_at', 'pk')
+        with transaction.atomic(using=self.db):
+            if connections[self.db].features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            self.due(now).filter(pk__in=due.values('pk')[:limit]).update(
+                claim=token, next_attempt_at=now + timedelta(seconds=lease)
+            )
+        return list(self.filter(claim=token).order_by('pk'))
+
+    def mark_sent(self):
+        return self.update(
+            status=EMAIL_SENT, sent_at=timezone.now(), claim='',
+            last_error=''
+        )
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку командой send_emails."""
+
+    to = models.EmailField(max_length=EMAIL, verbose_name='Получатель')
+    subject = models.CharField(max_length=EMAIL_SUBJECT, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    status = models.CharField(
+        max_length=max(len(status) for status, _ in EMAIL_STATUS_CHOICES),
+        choices=EMAIL_STATUS_CHOICES,
+        default=EMAIL_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток отправки'
+    )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Следующая попытка'
+    )
+    claim = models.CharField(
+        max_length=32, blank=True, verbose_name='Метка воркера'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Создано'
+    )
+    sent_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Отправлено'
+    )
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('id',)
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outgoing_email_due_idx'
+            ),
+        )
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+    def schedule_retry(self, error, max_attempts, backoff, backoff_max):
+        """Учти неудачную попытку: отложи письмо или признай неотправимым.
+
+        Пауза растёт вдвое после каждой попытки: backoff, 2 * backoff, ...
+        но не больше backoff_max секунд.
+        """
+        self.attempts += 1
+        self.last_error = str(error)
+        self.claim = ''
+        if self.attempts >= max_attempts:
+            self.status = EMAIL_FAILED
+        else:
+            delay = min(backoff * 2 ** (self.attempts - 1), backoff_max)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=(
+            'attempts', 'last_error', 'claim', 'status', 'next_attempt_at'
+        ))
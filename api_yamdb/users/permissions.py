@@ -16,8 +16,9 @@ class IsAdminOrModeratorOrAuthor(permissions.BasePermission):
                 or request.user.is_authenticated)
 
     def has_object_permission(self, request, view, obj):
+        # Сравнение id не загружает автора из базы.
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.id
                 or request.user.is_moderator
                 or request.user.is_admin)
 
@@ -1,13 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db.models import Q
 from rest_framework import serializers
 
+from api_yamdb.instrumentation import TimedSerializerMixin
 from users.mixins import ValidateUsernameMixin
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
+class UserSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer, ValidateUsernameMixin
+):
 
     class Meta:
         model = User
@@ -16,7 +20,9 @@ class UserSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
         )
 
 
-class NotAdminSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
+class NotAdminSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer, ValidateUsernameMixin
+):
 
     class Meta:
         model = User
@@ -26,7 +32,9 @@ class NotAdminSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
         read_only_fields = ('role',)
 
 
-class GetTokenSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
+class GetTokenSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer, ValidateUsernameMixin
+):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
 
@@ -35,7 +43,9 @@ class GetTokenSerializer(serializers.ModelSerializer, ValidateUsernameMixin):
         fields = ('username', 'confirmation_code')
 
 
-class SignUpSerializer(serializers.Serializer, ValidateUsernameMixin):
+class SignUpSerializer(
+    TimedSerializerMixin, serializers.Serializer, ValidateUsernameMixin
+):
     username = serializers.CharField(
         validators=(UnicodeUsernameValidator(),),
         max_length=150,
@@ -43,23 +53,35 @@ class SignUpSerializer(serializers.Serializer, ValidateUsernameMixin):
     email = serializers.EmailField(max_length=254)
 
     def validate(self, data):
-        if User.objects.filter(
-                email=data['email'], username=data['username']).first():
-            return (data)
-        elif (User.objects.filter(email=data['email']).first()
-                and User.objects.filter(username=data['username']).first()):
-            raise serializers.ValidationError(
-                {
-                    'username': 'Такой username уже используется.',
-                    'email': 'Такой email уже используется.'
-                }
-            )
-        elif User.objects.filter(email=data['email']).first():
-            raise serializers.ValidationError(
-                {'email': 'Такой email уже используется.'}
-            )
-        elif User.objects.filter(username=data['username']).first():
-            raise serializers.ValidationError(
-                {'username': 'Такой username уже используется.'}
-            )
-        return data
+        """Проверь username и email одним запросом к базе.
+
+        Найденный пользователь с обоими значениями попадает в
+        validated_data['user']: ему будет выслан новый код.
+        """
+        users = User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        ).only('id', 'username', 'email')
+        errors = {}
+        for user in users:
+            if (user.username, user.email) == (
+                data['username'], data['email']
+            ):
+                return {**data, 'user': user}
+            if user.username == data['username']:
+                errors['username'] = 'Такой username уже используется.'
+            if user.email == data['email']:
+                errors['email'] = 'Такой email уже используется.'
+        if errors:
+            raise serializers.ValidationError(errors)
+        return {**data, 'user': None}
+
+    def create(self, validated_data):
+        """Создай пользователя с кодом или обнови код одним запросом."""
+        user = validated_data.pop('user')
+        if user is None:
+            return User.objects.create(**validated_data)
+        User.objects.filter(pk=user.pk).update(
+            confirmation_code=validated_data['confirmation_code']
+        )
+        user.confirmation_code = validated_data['confirmation_code']
+        return user
@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.tokens import revoke_claims
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_claims(sender, instance, created, **kwargs):
+    """Отзови claims выданных токенов, если изменились права."""
+    if not created and instance.claims_changed():
+        revoke_claims(instance.pk)
+    instance.remember_claims()
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_claims(sender, instance, **kwargs):
+    revoke_claims(instance.pk)
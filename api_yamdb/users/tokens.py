@@ -0,0 +1,51 @@
+"""Токены доступа с ролью пользователя и отзыв этих данных.
+
+Роль и флаги прав записываются в claims токена, чтобы проверять
+права без запроса к таблице пользователей. Когда они меняются, момент
+изменения попадает в короткий список отзыва: более ранние токены
+пользователя проверяются по базе, пока не истечёт их срок. Если список
+недоступен, claims не доверяют никаким токенам.
+"""
+import logging
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.constsnts import CLAIM_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+def get_access_token(user):
+    """Токен доступа с claims из CLAIM_FIELDS."""
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def revocation_key(user_id):
+    return f'claims_revoked:{user_id}'
+
+
+def revoke_claims(user_id):
+    """Не доверяй claims токенов пользователя, выданных до этого момента."""
+    caches[settings.JWT_REVOCATION_CACHE].set(
+        revocation_key(user_id),
+        time(),
+        timeout=api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    )
+
+
+def claims_revoked(token):
+    try:
+        revoked_at = caches[settings.JWT_REVOCATION_CACHE].get(
+            revocation_key(token[api_settings.USER_ID_CLAIM])
+        )
+    except Exception:
+        logger.exception('Список отзыва claims недоступен.')
+        return True
+    return revoked_at is not None and token['iat'] <= revoked_at
@@ -1,19 +1,19 @@
 import random
 
 from django.contrib.auth import get_user_model
-from django.core.mail import EmailMessage
+from django.db import transaction
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from users.models import CONFIRMATION_CODE_LENGTH
+from users.models import CONFIRMATION_CODE_LENGTH, OutgoingEmail
 from users.permissions import AdminOnly
 from users.serializers import (GetTokenSerializer, NotAdminSerializer,
                                SignUpSerializer, UserSerializer)
+from users.tokens import get_access_token
 
 User = get_user_model()
 
@@ -68,7 +68,7 @@ class GetTokenView(APIView):
                 {'username': 'Пользователь не найден!'},
                 status=status.HTTP_404_NOT_FOUND)
         if data.get('confirmation_code') == user_instance.confirmation_code:
-            token = RefreshToken.for_user(user_instance).access_token
+            token = get_access_token(user_instance)
             return Response({'token': str(token)},
                             status=status.HTTP_200_OK)
         return Response(
@@ -81,13 +81,12 @@ class SignupView(APIView):
 
     @staticmethod
     def send_email(data):
-        """Отправь email."""
-        email = EmailMessage(
+        """Поставь email в очередь: его отправит команда send_emails."""
+        OutgoingEmail.objects.create(
+            to=data['to_email'],
             subject=data['email_subject'],
-            body=data['email_body'],
-            to=[data['to_email']]
+            body=data['email_body']
         )
-        email.send()
 
     @staticmethod
     def generate_confirmation_code() -> str:
@@ -101,21 +100,18 @@ class SignupView(APIView):
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user_instance = User.objects.get_or_create(
-            **serializer.validated_data)[0]
-        validated_username = serializer.validated_data['username']
-        User.objects.filter(
-            username=validated_username).update(
-            confirmation_code=self.generate_confirmation_code())
-
-        email_body = (
-            f'Привет, {user_instance.username}! '
-            f'Ваш код подтвержения: {user_instance.confirmation_code}'
-        )
-        data = {
-            'email_body': email_body,
-            'to_email': user_instance.email,
-            'email_subject': 'Код подтвержения для доступа к YamDB.'
-        }
-        self.send_email(data)
+        with transaction.atomic():
+            user_instance = serializer.save(
+                confirmation_code=self.generate_confirmation_code()
+            )
+            email_body = (
+                f'Привет, {user_instance.username}! '
+                f'Ваш код подтвержения: {user_instance.confirmation_code}'
+            )
+            data = {
+                'email_body': email_body,
+                'to_email': user_instance.email,
+                'email_subject': 'Код подтвержения для доступа к YamDB.'
+            }
+            self.send_email(data)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,28 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def file_caches(tmp_path_factory):
+    """Файловые кэши тестов — во временном каталоге.
+
+    Иначе тесты писали бы в кэши рядом с manage.py, меняли бы версии
+    данных и стирали бы список отзыва токенов запущенного локально
+    сервиса.
+    """
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    caches = {
+        alias: (
+            {**params, 'LOCATION': str(tmp_path_factory.mktemp(alias))}
+            if alias in (
+                settings.API_GENERATIONS_CACHE_ALIAS,
+                settings.JWT_REVOCATION_CACHE,
+            ) else params
+        )
+        for alias, params in settings.CACHES.items()
+    }
+    with override_settings(CACHES=caches):
+        yield
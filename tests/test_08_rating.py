@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, admin_client,
+                                              user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+
+        first = create_single_review(admin_client, title_id, 'Шедевр', 10)
+        create_single_review(user_client, title_id, 'Так себе', 4)
+        assert self.get_rating(admin_client, title_id) == 7, (
+            'Проверьте, что после создания отзывов рейтинг произведения '
+            'равен средней оценке.'
+        )
+
+        review_url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=first.json()['id']
+        )
+        response = admin_client.patch(review_url, data={'score': 6})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что после изменения оценки рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        response = admin_client.delete(review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 4, (
+            'Проверьте, что после удаления отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None, (
+            'Рейтинг произведения без отзывов должен быть `None`.'
+        )
+
+    def test_02_recount_rating(self, admin_client, user):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        Review.objects.bulk_create([
+            Review(title=title, author=user, text='Текст', score=3)
+        ])
+        Title.objects.recount_rating()
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count, title.rating) == (
+            3, 1, 3
+        ), (
+            'Проверьте, что `recount_rating` восстанавливает рейтинг после '
+            'массовой загрузки отзывов.'
+        )
@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def test_01_title_list_query_count(self, admin_client, client,
+                                       django_assert_num_queries):
+        from reviews.models import Genre, Title
+
+        titles, _, _ = create_titles(admin_client)
+        template = Title.objects.get(pk=titles[0]['id'])
+        genres = list(Genre.objects.all())
+        for number in range(8):
+            title = Title.objects.create(
+                name=f'Произведение {number}',
+                year=2000,
+                category=template.category
+            )
+            title.genre.set(genres)
+
+        with django_assert_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == 10, (
+            'Проверьте, что список произведений отдаётся постранично.'
+        )
+        with django_assert_num_queries(2):
+            client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(
+                    title_id=titles[0]['id']
+                )
+            )
+
+    def test_02_title_create_query_count(self, admin_client,
+                                         django_assert_max_num_queries):
+        from reviews.models import Category, Genre
+
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+            for number in range(6)
+        ]
+        data = {
+            'name': 'Терминатор',
+            'year': 1984,
+            'genre': [genre.slug for genre in genres],
+            'category': category.slug,
+        }
+        # Пользователь, жанры, категория, BEGIN, произведение и связи:
+        # ответ строится из уже найденных жанров.
+        with django_assert_max_num_queries(6):
+            response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == 201
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            genre.slug for genre in genres
+        ]
+
+        url = f'{self.TITLES_URL}{response.json()["id"]}/'
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.patch(
+                url, data={'genre': ['g2', 'g0']}, format='json'
+            )
+        assert response.status_code == 200
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'g2', 'g0'
+        ]
+        genre_reads = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and '"reviews_genre"' in query['sql']
+        ]
+        # Предвыборка жанров в get_object и поиск новых жанров по slug.
+        assert len(genre_reads) == 2, (
+            'Ответ на PATCH с жанрами должен строиться из жанров, '
+            'найденных при проверке, без нового запроса.'
+        )
+
+        response = admin_client.post(
+            self.TITLES_URL, data={**data, 'genre': ['g1', 'unknown']}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что при несуществующем жанре возвращается 400.'
+        )
+
+        response = admin_client.post(
+            self.TITLES_URL, data={**data, 'genre': None}, format='json'
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что произведение можно создать с `genre: null`.'
+        )
+        assert response.json()['genre'] == []
@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def walk(self, client, url):
+        response = client.get(url, {'cursor': '', 'limit': 2})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'В курсорном режиме ответ не должен содержать `count`.'
+        )
+        assert data['previous'] is None
+        pages = [[obj['id'] for obj in data['results']]]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append([obj['id'] for obj in data['results']])
+        previous = client.get(data['previous']).json()
+        assert [obj['id'] for obj in previous['results']] == pages[-2], (
+            'Проверьте, что ссылка `previous` ведёт на предыдущую страницу.'
+        )
+        return pages
+
+    def test_01_reviews_and_comments_cursor(self, admin_client, admin,
+                                            user_client, user,
+                                            moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+
+        pages = self.walk(
+            admin_client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+        assert pages == [
+            [reviews[2]['id'], reviews[1]['id']], [reviews[0]['id']]
+        ], (
+            'Проверьте, что курсорная пагинация отдаёт отзывы от новых к '
+            'старым без пропусков и повторов.'
+        )
+
+        pages = self.walk(
+            admin_client,
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            )
+        )
+        assert pages == [
+            [comments[2]['id'], comments[1]['id']], [comments[0]['id']]
+        ]
+
+        response = admin_client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            {'cursor': 'broken'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,181 @@
+from http import HTTPStatus
+from time import time
+
+import pytest
+
+from tests.utils import (create_reviews, create_single_comment,
+                         create_single_review)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_cached_until_write(self, admin_client, admin, client,
+                                   django_assert_num_queries):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+
+        first = client.get(self.TITLES_URL).json()
+        with django_assert_num_queries(0):
+            response = client.get(self.TITLES_URL)
+        assert response.json() == first, (
+            'Повторный GET-запрос должен отдавать тот же ответ из кэша.'
+        )
+
+        response = admin_client.patch(title_url, data={'name': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(title_url).json()['name'] == 'Новое', (
+            'После изменения произведения кэш должен сбрасываться.'
+        )
+        names = [title['name'] for title in client.get(
+            self.TITLES_URL).json()['results']]
+        assert 'Новое' in names
+
+        client.get(reviews_url)
+        response = admin_client.patch(
+            f'{reviews_url}{reviews[0]["id"]}/', data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(reviews_url).json()['results'][0]['score'] == 9
+        assert client.get(title_url).json()['rating'] == 9, (
+            'Изменение отзыва должно сбрасывать кэш рейтинга произведения.'
+        )
+
+    def test_02_conditional_get(self, admin_client, admin, client,
+                                monkeypatch):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        # Last-Modified выдаётся, когда секунда последней записи прошла.
+        monkeypatch.setattr('api.cache.time', lambda: time() + 1)
+        for url in (
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+        ):
+            response = client.get(url)
+            etag = response.get('ETag')
+            last_modified = response.get('Last-Modified')
+            assert etag and last_modified, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовки `ETag` и `Last-Modified`.'
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+            response = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+            assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        title_url = self.TITLES_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        etag = client.get(title_url)['ETag']
+        admin_client.patch(title_url, data={'name': 'Новое'})
+        response = client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'После изменения данных ETag должен меняться.'
+        )
+
+    def test_03_headers_replayed(self, admin_client, admin, client):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        first = client.get(url)
+        cached = client.get(url)
+        for header in ('Vary', 'Allow', 'Content-Type'):
+            assert cached.get(header) == first.get(header), (
+                f'Ответ из кэша должен содержать заголовок `{header}`.'
+            )
+
+    def test_04_generations_shared(self, admin_client, admin, client,
+                                   settings):
+        from django.core.cache.backends.filebased import FileBasedCache
+
+        from api.cache import generation_key, new_generation
+        from reviews.models import Title
+
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        client.get(url)
+        Title.objects.filter(pk=titles[0]['id']).update(name='Другой воркер')
+        # Версию меняет другой процесс со своим экземпляром кэша.
+        params = settings.CACHES[settings.API_GENERATIONS_CACHE_ALIAS]
+        FileBasedCache(params['LOCATION'], params).set(
+            generation_key(Title), new_generation(), timeout=None
+        )
+        assert client.get(url).json()['name'] == 'Другой воркер', (
+            'Запись в другом воркере должна сбрасывать кэш ответов '
+            'во всех воркерах.'
+        )
+
+    def test_05_write_in_same_second(self, admin_client, admin, client,
+                                     monkeypatch):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        monkeypatch.setattr('api.cache.time', lambda: time() + 1)
+        last_modified = client.get(url)['Last-Modified']
+        monkeypatch.undo()
+
+        admin_client.patch(url, data={'name': 'Новое'})
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Запись в ту же секунду не должна давать устаревший 304 '
+            'по If-Modified-Since.'
+        )
+        assert 'Last-Modified' not in response, (
+            'До конца секунды последней записи Last-Modified не выдаётся.'
+        )
+        assert response.json()['name'] == 'Новое'
+
+    def test_06_etag_scoped_to_title(self, admin_client, admin, client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        title_a, title_b = titles[0]['id'], titles[1]['id']
+        create_single_review(admin_client, title_b, 'Отзыв к B', 7)
+        reviews_b = self.REVIEWS_URL_TEMPLATE.format(title_id=title_b)
+        comments_a = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_a)
+            + f'{reviews[0]["id"]}/comments/'
+        )
+        etags = {url: client.get(url)['ETag'] for url in (
+            reviews_b, comments_a
+        )}
+
+        admin_client.patch(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_a)
+            + f'{reviews[0]["id"]}/',
+            data={'text': 'Изменённый отзыв к A'}
+        )
+        response = client.get(reviews_b, HTTP_IF_NONE_MATCH=etags[reviews_b])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Запись отзыва к одному произведению не должна менять ETag '
+            'списка отзывов к другому.'
+        )
+
+        create_single_comment(admin_client, title_a, reviews[0]['id'], 'К')
+        response = client.get(comments_a, HTTP_IF_NONE_MATCH=etags[comments_a])
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 1, (
+            'Новый комментарий должен сбрасывать кэш своего списка.'
+        )
+        response = client.get(reviews_b, HTTP_IF_NONE_MATCH=etags[reviews_b])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_07_key_includes_host(self, admin_client, client, settings):
+        settings.ALLOWED_HOSTS = ['testserver', 'mirror.yamdb.fake']
+        create_reviews(admin_client, {})
+        url = f'{self.TITLES_URL}?limit=1'
+        first = client.get(url).json()
+        assert first['next'].startswith('http://testserver/')
+        mirror = client.get(url, HTTP_HOST='mirror.yamdb.fake').json()
+        assert mirror['next'].startswith('http://mirror.yamdb.fake/'), (
+            'Ответ, закэшированный для одного хоста, не должен отдаваться '
+            'с его ссылками на другом.'
+        )
+        secure = client.get(url, secure=True).json()
+        assert secure['next'].startswith('https://testserver/')
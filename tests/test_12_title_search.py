@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_name_and_description(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'{self.TITLES_URL}{titles[1]["id"]}/',
+            data={'description': 'Терминатор отдыхает'}
+        )
+
+        assert self.search(client, name='терм') == ['Терминатор'], (
+            'Проверьте, что фильтр `name` находит произведения по началу '
+            'слова без учёта регистра.'
+        )
+        assert self.search(client, name='КРЕПКИЙ орешек') == [
+            'Крепкий орешек'
+        ]
+        assert self.search(client, name='отдыхает') == [], (
+            'Фильтр `name` не должен искать по описанию.'
+        )
+        assert self.search(client, search='терминатор') == [
+            'Терминатор', 'Крепкий орешек'
+        ], (
+            'Проверьте, что параметр `search` ищет по названию и описанию '
+            'и ставит лучшие совпадения первыми.'
+        )
+        admin_client.patch(
+            f'{self.TITLES_URL}{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        assert self.search(client, search='чуж') == ['Чужой'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+    def test_02_search_joins_index_once(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'{self.TITLES_URL}{titles[1]["id"]}/',
+            data={'description': 'Терминатор отдыхает'}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            names = self.search(client, search='терминатор')
+        assert names == ['Терминатор', 'Крепкий орешек']
+        searches = [
+            query['sql'] for query in queries.captured_queries
+            if 'reviews_title_fts' in query['sql']
+        ]
+        assert searches
+        for sql in searches:
+            assert sql.count('MATCH') == 1, (
+                'Полнотекстовый индекс должен присоединяться к запросу '
+                'один раз, без MATCH в подзапросе для каждой строки.'
+            )
+            assert 'SELECT rowid' not in sql
+        assert self.search(
+            client, search='терминатор', name='крепкий'
+        ) == ['Крепкий орешек'], (
+            'Фильтры `search` и `name` должны работать вместе.'
+        )
+
+    def test_03_filter_by_slugs(self, admin_client, client):
+        create_titles(admin_client)
+
+        assert self.search(client, genre='horror') == ['Терминатор']
+        assert self.search(client, genre='horr') == [], (
+            'Проверьте, что фильтр `genre` ищет по точному совпадению slug.'
+        )
+        assert sorted(self.search(client, genre='comedy,drama')) == [
+            'Крепкий орешек', 'Терминатор'
+        ], (
+            'Проверьте, что фильтр `genre` принимает несколько slug '
+            'через запятую.'
+        )
+        assert self.search(client, genre_contains='o') == ['Терминатор'], (
+            'Проверьте, что фильтр `genre_contains` ищет по подстроке '
+            'без дублей.'
+        )
+        assert self.search(client, category='books') == ['Крепкий орешек']
+        assert self.search(client, category_contains='film') == [
+            'Терминатор'
+        ]
+
+    def test_04_migration_deduplicates_slugs(self):
+        from django.db import connection
+        from django.db.migrations.executor import MigrationExecutor
+
+        before = [('reviews', '0004_title_fts')]
+        after = [('reviews', '0005_unique_slugs')]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        Genre = executor.loader.project_state(before).apps.get_model(
+            'reviews', 'Genre'
+        )
+        first, second, third = (
+            Genre.objects.create(name=f'Рок {number}', slug='rock')
+            for number in range(3)
+        )
+        Genre.objects.create(name='Занятый', slug=f'rock-{second.id}')
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(after)
+        Genre = executor.loader.project_state(after).apps.get_model(
+            'reviews', 'Genre'
+        )
+        slugs = dict(Genre.objects.values_list('id', 'slug'))
+        assert slugs[first.id] == 'rock'
+        assert slugs[second.id] == f'rock-{second.id}-1'
+        assert slugs[third.id] == f'rock-{third.id}'
+        assert len(set(slugs.values())) == len(slugs), (
+            'Миграция должна переименовывать повторяющиеся slug '
+            'перед добавлением уникальности.'
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
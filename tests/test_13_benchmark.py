@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Benchmark:
+
+    def run_benchmark(self, tmp_path, *args):
+        output = tmp_path / 'report.json'
+        call_command(
+            'benchmark', '--in-place', '--users', '20', '--titles', '10',
+            '--reviews', '60', '--comments', '60', '--iterations', '3',
+            '--warmup', '0', '--output', str(output), *args
+        )
+        return json.loads(output.read_text(encoding='utf-8'))
+
+    def test_01_report(self, tmp_path):
+        report = self.run_benchmark(
+            tmp_path, '--cold', '--only', 'titles', 'reviews', 'token'
+        )
+        routes = report['routes']
+        assert {'titles', 'titles-search', 'reviews', 'token'} <= set(
+            routes
+        ), 'Отчёт должен содержать выбранные сценарии.'
+        assert 'title' not in routes
+        titles = routes['titles']
+        assert titles['status'] == 200
+        assert titles['queries'] == 3, (
+            'Без кэша список произведений должен занимать 3 запроса.'
+        )
+        assert titles['bytes'] > 0
+        assert 0 < titles['p50_ms'] <= titles['p99_ms'] <= titles['max_ms']
+        assert report['meta']['dataset']['reviews.review'] == 60
+
+    def test_02_all_routes_covered(self, tmp_path):
+        report = self.run_benchmark(tmp_path, '--iterations', '1')
+        assert report['uncovered'] == [], (
+            'У каждого маршрута API должен быть сценарий замера.'
+        )
+        assert all(
+            result['status'] < 400 for result in report['routes'].values()
+        )
+
+    def test_03_baseline_regression(self, tmp_path):
+        report = self.run_benchmark(tmp_path, '--cold', '--only', 'titles')
+        for result in report['routes'].values():
+            result['queries'] -= 1
+        baseline = tmp_path / 'baseline.json'
+        baseline.write_text(json.dumps(report), encoding='utf-8')
+        with pytest.raises(CommandError, match='регрессий'):
+            self.run_benchmark(
+                tmp_path, '--cold', '--only', 'titles', '--no-seed',
+                '--baseline', str(baseline)
+            )
+
+    def test_04_queries_in_default_mode(self, tmp_path):
+        report = self.run_benchmark(
+            tmp_path, '--only', 'titles', 'review-create', 'review-delete'
+        )
+        routes = report['routes']
+        assert report['meta']['cold'] is False
+        assert routes['titles']['queries'] == 3, (
+            'Число запросов к базе должно считаться без кэша ответов '
+            'и без --cold.'
+        )
+        cold = self.run_benchmark(
+            tmp_path, '--cold', '--no-seed',
+            '--only', 'review-create', 'review-delete'
+        )['routes']
+        for name in ('review-create', 'review-delete'):
+            assert routes[name]['queries'] == cold[name]['queries']
+        assert routes['review-delete']['queries'] == 6, (
+            'Подготовка данных сценария не должна попадать в число запросов.'
+        )
+        assert routes['review-create']['queries'] == 4
@@ -0,0 +1,86 @@
+import logging
+import logging.handlers
+import re
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14RequestTiming:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def timing_records(self, settings):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1
+        # Журнал api.timing не передаёт записи корневому логгеру,
+        # поэтому caplog их не видит.
+        handler = logging.handlers.BufferingHandler(capacity=1000)
+        logger = logging.getLogger('api.timing')
+        logger.addHandler(handler)
+        yield handler.buffer
+        logger.removeHandler(handler)
+
+    @staticmethod
+    def parse_server_timing(header):
+        metrics = {}
+        for metric in header.split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(
+                param.split('=', 1) for param in params
+            )
+        return metrics
+
+    def test_01_server_timing(self, admin_client, client, timing_records):
+        create_titles(admin_client)
+        timing_records.clear()
+        response = admin_client.get(self.TITLES_URL)
+        assert 'Server-Timing' in response, (
+            'Ответ администратору должен содержать заголовок Server-Timing.'
+        )
+        metrics = self.parse_server_timing(response['Server-Timing'])
+        assert {'db', 'serialize', 'render', 'total'} <= set(metrics), (
+            'Server-Timing должен содержать время базы, сериализации, '
+            'рендеринга и общее.'
+        )
+        # Токен без claims: пользователь читается из базы.
+        assert metrics['db']['desc'] == '"4 queries"'
+        for name in ('serialize', 'render'):
+            assert float(metrics[name]['dur']) > 0
+        assert float(metrics['total']['dur']) >= sum(
+            float(metrics[name]['dur'])
+            for name in ('db', 'serialize', 'render')
+        )
+
+        assert len(timing_records) == 1, (
+            'Каждый замеренный запрос должен попадать в журнал api.timing.'
+        )
+        data = timing_records[0].data
+        assert data['route'] == 'title-list'
+        assert data['status'] == 200
+        assert data['queries'] == 4
+        assert data['bytes'] == len(response.content)
+
+        response = client.get(self.TITLES_URL)
+        assert 'Server-Timing' not in response, (
+            'Анонимный клиент не должен получать заголовок Server-Timing.'
+        )
+        assert len(timing_records) == 2
+
+    def test_02_sampling(self, client, settings, timing_records):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0
+        response = client.get(self.TITLES_URL)
+        assert 'Server-Timing' not in response, (
+            'При REQUEST_TIMING_SAMPLE_RATE = 0 запросы не замеряются.'
+        )
+        assert not timing_records
+
+    def test_03_json_log_format(self, client, timing_records):
+        from api_yamdb.instrumentation import JsonFormatter
+
+        client.get(self.TITLES_URL)
+        line = JsonFormatter().format(timing_records[-1])
+        assert re.search(r'"route": "title-list"', line)
+        assert re.search(r'"total_ms": [\d.]+', line)
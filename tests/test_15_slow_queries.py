@@ -0,0 +1,93 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SlowQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    @pytest.fixture
+    def slow_log(self, settings, tmp_path):
+        path = tmp_path / 'slow_queries.jsonl'
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        settings.SLOW_QUERY_LOG_FILE = str(path)
+        return path
+
+    @staticmethod
+    def read_entries(path):
+        return [
+            json.loads(line)
+            for line in path.read_text(encoding='utf-8').splitlines()
+        ]
+
+    def test_01_recorded_with_plan(self, admin_client, admin, client,
+                                   slow_log):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        slow_log.unlink()
+        client.get(self.TITLES_URL, {'year': 1999})
+        client.get(
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        )
+
+        entries = self.read_entries(slow_log)
+        assert {entry['view'] for entry in entries} == {
+            'TitleViewSet', 'ReviewViewSet'
+        }, (
+            'Каждый запрос должен записываться вместе с представлением, '
+            'из которого он пришёл.'
+        )
+        title_entry = next(
+            entry for entry in entries
+            if entry['view'] == 'TitleViewSet'
+            and entry['sql'].startswith('SELECT COUNT')
+        )
+        assert title_entry['route'] == 'title-list'
+        assert title_entry['params'] == [1999]
+        assert title_entry['duration_ms'] >= 0
+        assert title_entry['plan'], (
+            'Для SELECT должен сохраняться план выполнения.'
+        )
+        assert '?' in title_entry['fingerprint']
+        assert '1999' not in title_entry['fingerprint']
+
+    def test_02_disabled_by_default(self, client, settings, tmp_path):
+        path = tmp_path / 'slow_queries.jsonl'
+        settings.SLOW_QUERY_THRESHOLD_MS = None
+        settings.SLOW_QUERY_LOG_FILE = str(path)
+        client.get(self.TITLES_URL)
+        assert not path.exists(), (
+            'Без порога медленные запросы не должны записываться.'
+        )
+
+    def test_03_top_offenders(self, client, slow_log):
+        for year in (1990, 1991, 1992):
+            client.get(self.TITLES_URL, {'year': year})
+        out = StringIO()
+        call_command(
+            'slow_queries', '--file', str(slow_log), '--order-by', 'count',
+            '--view', 'TitleViewSet', stdout=out
+        )
+        report = out.getvalue()
+        assert report.startswith('1. 3 раз'), (
+            'Запросы, различающиеся только параметрами, должны '
+            'группироваться вместе.'
+        )
+        assert 'TitleViewSet (title-list)' in report
+        assert 'Полный просмотр таблиц: reviews_title' in report
+
+    def test_04_full_scans(self):
+        from api.management.commands.slow_queries import full_scans
+
+        assert full_scans([
+            'SCAN reviews_title',
+            'SCAN reviews_review USING INDEX review_title_pub_date_idx',
+            'SEARCH reviews_category USING INTEGER PRIMARY KEY (rowid=?)',
+            'Seq Scan on reviews_comment  (cost=0.00..1.01 rows=1 width=4)',
+        ]) == ['reviews_title', 'reviews_comment']
@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import re
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+def increment_in_child(directory):
+    from django.conf import settings
+
+    from api import metrics
+
+    settings.METRICS_DIR = directory
+    metrics.REQUESTS.inc(route='title-list', method='GET', status=200)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Metrics:
+
+    METRICS_URL = '/metrics'
+    TITLES_URL = '/api/v1/titles/'
+    SIGNUP_URL = '/api/v1/auth/signup/'
+
+    @pytest.fixture(autouse=True)
+    def metrics_dir(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path / 'metrics')
+        return settings.METRICS_DIR
+
+    @staticmethod
+    def sample(text, name, **labels):
+        label_text = ','.join(
+            f'{label}="{value}"' for label, value in labels.items()
+        )
+        match = re.search(
+            rf'^{re.escape(name)}\{{{re.escape(label_text)}\}} (\S+)$',
+            text,
+            re.MULTILINE
+        )
+        return float(match.group(1)) if match else None
+
+    def test_01_admin_only(self, client, user_client, admin_client):
+        assert client.get(self.METRICS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Метрики не должны быть доступны анониму.'
+        assert user_client.get(self.METRICS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Метрики доступны только администратору.'
+        response = admin_client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+
+    def test_02_requests_queries_cache(self, admin_client, client):
+        create_titles(admin_client)
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+        text = admin_client.get(self.METRICS_URL).content.decode()
+
+        assert '# TYPE api_requests_total counter' in text
+        assert self.sample(
+            text, 'api_requests_total',
+            route='title-list', method='GET', status=200
+        ) == 2, 'Запросы должны считаться по имени маршрута из роутера.'
+        assert self.sample(
+            text, 'api_request_duration_seconds_count',
+            route='title-list', method='GET'
+        ) == 2
+        assert self.sample(
+            text, 'api_request_duration_seconds_bucket',
+            route='title-list', method='GET', le='+Inf'
+        ) == 2
+        assert self.sample(
+            text, 'api_request_db_queries_sum',
+            route='title-list', method='GET'
+        ) == 3, 'Второй запрос отдан из кэша без обращений к базе.'
+        assert self.sample(
+            text, 'api_response_cache_total',
+            route='title-list', result='miss'
+        ) == 1
+        assert self.sample(
+            text, 'api_response_cache_total',
+            route='title-list', result='hit'
+        ) == 1
+
+    def test_03_email_latency(self, client, admin_client):
+        response = client.post(
+            self.SIGNUP_URL,
+            data={'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        call_command('send_emails', stdout=StringIO())
+        text = admin_client.get(self.METRICS_URL).content.decode()
+        assert self.sample(
+            text, 'api_email_send_duration_seconds_count', status='ok'
+        ) == 1, 'Должно учитываться время отправки писем.'
+        assert self.sample(
+            text, 'api_email_outbox_total', result='sent'
+        ) == 1
+
+    def test_04_aggregated_across_processes(self, metrics_dir):
+        from api import metrics
+
+        metrics.REQUESTS.inc(route='title-list', method='GET', status=200)
+        context = multiprocessing.get_context('fork')
+        for _ in range(2):
+            process = context.Process(
+                target=increment_in_child, args=(metrics_dir,)
+            )
+            process.start()
+            process.join()
+            assert process.exitcode == 0
+        assert self.sample(
+            metrics.render(), 'api_requests_total',
+            route='title-list', method='GET', status=200
+        ) == 3, 'Значения всех процессов должны складываться.'
+
+    def test_05_dead_processes_archived(self, metrics_dir):
+        from api import metrics
+
+        context = multiprocessing.get_context('fork')
+        for _ in range(2):
+            process = context.Process(
+                target=increment_in_child, args=(metrics_dir,)
+            )
+            process.start()
+            process.join()
+        assert len(os.listdir(metrics_dir)) == 2
+        for _ in range(2):
+            assert self.sample(
+                metrics.render(), 'api_requests_total',
+                route='title-list', method='GET', status=200
+            ) == 2, 'Значения завершившихся процессов не должны теряться.'
+        assert sorted(
+            name for name in os.listdir(metrics_dir)
+            if name.endswith(metrics.FILE_SUFFIX)
+        ) == ['archive.metrics'], (
+            'Файлы завершившихся процессов должны переноситься в архив.'
+        )
+
+    def test_06_store_grows(self, metrics_dir):
+        from api import metrics
+
+        for number in range(3000):
+            metrics.REQUESTS.inc(route=f'route-{number}', method='GET',
+                                 status=200)
+        totals = metrics.collect()
+        assert len(totals) == 3000
+        assert set(totals.values()) == {1}
@@ -0,0 +1,116 @@
+import json
+import os
+import pstats
+import re
+import sys
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+COLLAPSED_LINE = re.compile(r'^\S.* \d+$')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Profiling:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def profile_dir(self, settings, tmp_path):
+        settings.PROFILE_DIR = str(tmp_path / 'profiles')
+        return settings.PROFILE_DIR
+
+    def test_01_ignored_for_non_admins(self, client, user_client,
+                                       profile_dir):
+        for api_client in (client, user_client):
+            response = api_client.get(
+                self.TITLES_URL, {'profile': 'text'}, HTTP_X_PROFILE='1'
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert 'results' in json.loads(response.content), (
+                'Флаг профилирования не должен действовать для '
+                'пользователя без прав администратора.'
+            )
+            assert 'X-Profile-Id' not in response
+        assert not os.path.exists(profile_dir)
+
+    def test_02_text(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.get(self.TITLES_URL, {'profile': 'text'})
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        assert response['X-Profiled-Status'] == '200'
+        text = response.content.decode()
+        assert 'cumulative' in text, (
+            'Сводка pstats должна быть отсортирована по суммарному времени.'
+        )
+        assert 'to_representation' in text
+
+    @pytest.fixture
+    def frequent_samples(self, settings):
+        """Частая выборка, чтобы короткий запрос успел попасть в стеки."""
+        settings.PROFILE_SAMPLE_INTERVAL = 0.0005
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(0.0005)
+        yield
+        sys.setswitchinterval(interval)
+
+    def test_03_collapsed(self, admin_client, frequent_samples):
+        create_titles(admin_client)
+        response = admin_client.get(
+            self.TITLES_URL, {'profile': 'collapsed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        lines = response.content.decode().splitlines()
+        assert lines
+        assert all(COLLAPSED_LINE.match(line) for line in lines), (
+            'Каждая строка — стек через `;` и число выборок.'
+        )
+        assert all(line.startswith('inner (') for line in lines), (
+            'Стеки должны начинаться с обработчика запроса, без кадров '
+            'сервера и самого профилировщика.'
+        )
+
+    def test_04_pstats(self, admin_client, tmp_path):
+        response = admin_client.get(self.TITLES_URL, {'profile': 'pstats'})
+        assert response.status_code == HTTPStatus.OK
+        assert 'attachment' in response['Content-Disposition']
+        path = tmp_path / 'request.pstats'
+        path.write_bytes(response.content)
+        assert pstats.Stats(str(path)).total_calls > 0, (
+            'Ответ должен читаться модулем pstats.'
+        )
+
+    def test_05_store(self, admin_client, profile_dir):
+        response = admin_client.get(
+            self.TITLES_URL, HTTP_X_PROFILE='store'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'results' in json.loads(response.content), (
+            'При сохранении профиля клиент получает обычный ответ.'
+        )
+        profile_id = response['X-Profile-Id']
+        assert 'title-list' in profile_id
+        base = os.path.join(profile_dir, profile_id)
+        assert pstats.Stats(f'{base}.pstats').total_calls > 0
+        with open(f'{base}.collapsed', encoding='utf-8') as file:
+            assert all(
+                COLLAPSED_LINE.match(line) for line in file.read().splitlines()
+            )
+
+    def test_06_store_keeps_latest(self, admin_client, profile_dir,
+                                   settings):
+        settings.PROFILE_MAX_COUNT = 2
+        profile_ids = [
+            admin_client.get(
+                self.TITLES_URL, HTTP_X_PROFILE='store'
+            )['X-Profile-Id']
+            for _ in range(3)
+        ]
+        assert sorted(os.listdir(profile_dir)) == sorted(
+            f'{profile_id}{extension}'
+            for profile_id in profile_ids[1:]
+            for extension in ('.pstats', '.collapsed')
+        ), 'В PROFILE_DIR должны оставаться только последние профили.'
@@ -0,0 +1,60 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18SqliteProfile:
+
+    def test_01_benchmark(self, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command(
+            'benchmark_sqlite', readers=2, writers=2, duration=0.5,
+            rows=500, connects=5, output=str(output), stdout=StringIO()
+        )
+        report = json.loads(output.read_text(encoding='utf-8'))
+        development = report['profiles']['development']
+        production = report['profiles']['production']
+
+        assert development['journal_mode'] == 'delete'
+        assert production['journal_mode'] == 'wal', (
+            'В профиле production соединения должны открываться с WAL.'
+        )
+        assert production['conn_max_age'] > 0
+        assert production['reads'] > 0 and production['writes'] > 0
+        assert production['reads_errors'] == 0
+        assert production['writes_errors'] == 0, (
+            'С BEGIN IMMEDIATE и ожиданием блокировки записи не должны '
+            'падать с `database is locked`.'
+        )
+
+    def test_02_unknown_profile(self):
+        with pytest.raises(CommandError):
+            call_command('benchmark_sqlite', profiles=['unknown'])
+
+    def test_03_pragmas_applied(self, settings, tmp_path):
+        from django.db import connections
+
+        connections.databases['pragmas'] = {
+            **settings.SQLITE_PROFILES['production'],
+            'ENGINE': 'api_yamdb.sqlite3',
+            'NAME': str(tmp_path / 'pragmas.sqlite3'),
+        }
+        connections.ensure_defaults('pragmas')
+        connections.prepare_test_settings('pragmas')
+        try:
+            with connections['pragmas'].cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                assert cursor.fetchone()[0] == 1, (
+                    'Ожидался synchronous=NORMAL.'
+                )
+                cursor.execute('PRAGMA busy_timeout')
+                assert cursor.fetchone()[0] > 0
+            assert connections['pragmas'].transaction_mode == 'IMMEDIATE'
+        finally:
+            connections['pragmas'].close()
+            del connections['pragmas']
+            del connections.databases['pragmas']
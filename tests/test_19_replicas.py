@@ -0,0 +1,104 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connections
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Replicas:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture
+    def replica(self, settings, tmp_path):
+        from api.replicas import sync_replicas
+
+        connections.databases['replica'] = {
+            **connections['default'].settings_dict,
+            'NAME': str(tmp_path / 'replica.sqlite3'),
+            'TEST': {},
+        }
+        settings.DATABASE_REPLICAS = ['replica']
+        settings.REPLICA_MAX_LAG = 60
+        sync_replicas()
+        yield connections['replica']
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+
+    @staticmethod
+    def rename_on_replica(replica, title_id, name):
+        with replica.cursor() as cursor:
+            cursor.execute(
+                'UPDATE reviews_title SET name = %s WHERE id = %s',
+                (name, title_id)
+            )
+
+    def test_01_safe_catalog_reads_from_replica(self, admin_client, replica):
+        from api.replicas import sync_replicas
+
+        titles, _, _ = create_titles(admin_client)
+        sync_replicas()
+        self.rename_on_replica(replica, titles[0]['id'], 'С реплики')
+
+        response = admin_client.get(f'{self.TITLES_URL}{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['name'] == 'С реплики', (
+            'GET-запросы к каталогу должны читать с реплики.'
+        )
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Пользователи читаются с основной базы.'
+        )
+
+    def test_02_writes_go_to_primary(self, admin_client, user_client,
+                                     replica):
+        from api.replicas import sync_replicas
+
+        titles, _, _ = create_titles(admin_client)
+        sync_replicas()
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/reviews/'
+        response = user_client.post(url, data={'text': 'Текст', 'score': 8})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['score'] == 8
+
+        with replica.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM reviews_review')
+            assert cursor.fetchone()[0] == 0, (
+                'Запись не должна попадать на реплику.'
+            )
+        assert admin_client.get(url).json()['count'] == 0, (
+            'До синхронизации реплика не видит новый отзыв.'
+        )
+        sync_replicas()
+        assert admin_client.get(url).json()['count'] == 1
+
+    def test_03_pinned_after_write(self, admin_client, replica):
+        from api.replicas import (allow_replica_reads, get_replica,
+                                  request_scope)
+        from reviews.models import Category, Title
+
+        create_titles(admin_client)
+        with request_scope():
+            allow_replica_reads()
+            assert Title.objects.all().db == 'replica'
+            Category.objects.create(name='Новая', slug='new')
+            assert get_replica() is None
+            assert Title.objects.all().db == 'default', (
+                'После записи запрос должен читать с основной базы.'
+            )
+        assert Title.objects.all().db == 'default'
+
+    def test_04_lagging_responses_not_cached(self, admin_client, settings,
+                                             replica):
+        create_titles(admin_client)
+        response = admin_client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert 'ETag' not in response, (
+            'Ответ по данным новее допустимого отставания реплики '
+            'не должен кэшироваться.'
+        )
+        settings.REPLICA_MAX_LAG = 0
+        assert 'ETag' in admin_client.get(self.TITLES_URL)
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class FlakyBackend(EmailBackend):
+    """Почтовый бэкенд, который не может отправить письма на fail@."""
+
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        FlakyBackend.instances += 1
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(address.startswith('fail@') for address in message.to):
+                raise ConnectionError('Сервер недоступен')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20EmailOutbox:
+
+    SIGNUP_URL = '/api/v1/auth/signup/'
+
+    @pytest.fixture
+    def flaky_backend(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_20_email_outbox.FlakyBackend'
+        FlakyBackend.instances = 0
+
+    @staticmethod
+    def send_emails():
+        call_command('send_emails', stdout=StringIO(), stderr=StringIO())
+
+    def test_01_signup_enqueues(self, client):
+        from users.models import OutgoingEmail
+
+        response = client.post(
+            self.SIGNUP_URL,
+            data={'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            'Регистрация не должна отправлять письмо сама.'
+        )
+        message = OutgoingEmail.objects.get()
+        assert message.to == 'new_user@yamdb.fake'
+        assert message.status == 'pending'
+
+        self.send_emails()
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['new_user@yamdb.fake']
+        message.refresh_from_db()
+        assert message.status == 'sent' and message.sent_at is not None
+
+        self.send_emails()
+        assert len(mail.outbox) == 1, 'Письмо не должно уйти дважды.'
+
+    def test_02_batch_over_one_connection(self, flaky_backend):
+        from users.models import OutgoingEmail
+
+        for number in range(5):
+            OutgoingEmail.objects.create(
+                to=f'user{number}@yamdb.fake', subject='Тема', body='Текст'
+            )
+        self.send_emails()
+        assert len(mail.outbox) == 5
+        assert FlakyBackend.instances == 1, (
+            'Порция писем должна отправляться через одно соединение.'
+        )
+
+    def test_03_retry_with_backoff(self, settings, flaky_backend):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+        settings.EMAIL_OUTBOX_BACKOFF = 10
+        failing = OutgoingEmail.objects.create(
+            to='fail@yamdb.fake', subject='Тема', body='Текст'
+        )
+        OutgoingEmail.objects.create(
+            to='ok@yamdb.fake', subject='Тема', body='Текст'
+        )
+        started = timezone.now()
+        self.send_emails()
+        assert [message.to for message in mail.outbox] == [
+            ['ok@yamdb.fake']
+        ], 'Ошибка одного письма не должна мешать остальным.'
+        failing.refresh_from_db()
+        assert failing.status == 'pending'
+        assert failing.attempts == 1
+        assert 'Сервер недоступен' in failing.last_error
+        assert failing.next_attempt_at >= started + timedelta(seconds=10)
+
+        self.send_emails()
+        failing.refresh_from_db()
+        assert failing.attempts == 1, 'До конца паузы письмо не отправляется.'
+
+        for attempts, delay in ((2, 20), (3, None)):
+            OutgoingEmail.objects.filter(pk=failing.pk).update(
+                next_attempt_at=timezone.now()
+            )
+            started = timezone.now()
+            self.send_emails()
+            failing.refresh_from_db()
+            assert failing.attempts == attempts
+            if delay is not None:
+                assert failing.status == 'pending'
+                assert failing.next_attempt_at >= (
+                    started + timedelta(seconds=delay)
+                ), 'Пауза должна расти вдвое после каждой попытки.'
+        assert failing.status == 'failed', (
+            'После EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо не отправляется.'
+        )
+
+    def test_04_claimed_messages_skipped(self):
+        from users.models import OutgoingEmail
+
+        OutgoingEmail.objects.create(
+            to='user@yamdb.fake', subject='Тема', body='Текст'
+        )
+        claimed = OutgoingEmail.objects.claim(10, lease=60)
+        assert len(claimed) == 1
+        assert OutgoingEmail.objects.claim(10, lease=60) == [], (
+            'Письма, забранные одним воркером, не достаются другому.'
+        )
@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import create_titles
+
+
+def users_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if 'users_customuser' in query['sql']
+    ]
+
+
+def claims_client(user):
+    from users.tokens import get_access_token
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21StatelessAuth:
+
+    TITLES_URL = '/api/v1/titles/'
+    USERS_URL = '/api/v1/users/'
+    ME_URL = '/api/v1/users/me/'
+
+    @pytest.fixture(autouse=True)
+    def revocations(self):
+        from django.conf import settings
+        from django.core.cache import caches
+
+        revocations = caches[settings.JWT_REVOCATION_CACHE]
+        revocations.clear()
+        return revocations
+
+    def test_01_token_has_claims(self, client, user):
+        user.confirmation_code = '1234'
+        user.save()
+        response = client.post(
+            '/api/v1/auth/token/',
+            data={'username': user.username, 'confirmation_code': '1234'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == user.role
+        assert token['username'] == user.username
+        assert token['is_staff'] is False
+        assert token['is_superuser'] is False
+
+    def test_02_no_user_query(self, admin_client, admin):
+        create_titles(admin_client)
+        api_client = claims_client(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as database_queries:
+            admin_client.get(self.USERS_URL)
+        assert len(queries) == len(database_queries) - 1, (
+            'Права администратора должны проверяться по claims токена, '
+            'без отдельного запроса за пользователем.'
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(self.TITLES_URL, data={
+                'name': 'Новое', 'year': 2000, 'genre': ['horror'],
+                'category': 'films'
+            })
+        assert response.status_code == HTTPStatus.CREATED
+        assert users_queries(queries) == []
+
+    def test_03_lazy_full_row(self, user):
+        api_client = claims_client(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert len(users_queries(queries)) == 1, (
+            'Остальные поля пользователя должны загружаться одним запросом.'
+        )
+
+        response = api_client.patch(self.ME_URL, data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.bio == 'Новое'
+        assert user.email == response.json()['email']
+
+    def test_04_author_from_claims(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        response = claims_client(user).post(
+            f'{self.TITLES_URL}{titles[0]["id"]}/reviews/',
+            data={'text': 'Текст', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+
+    def test_05_role_change_revokes_claims(self, admin_client, user, admin):
+        promoted = claims_client(user)
+        demoted = claims_client(admin)
+        assert promoted.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert promoted.get(self.USERS_URL).status_code == HTTPStatus.OK, (
+            'После смены роли права должны проверяться по базе.'
+        )
+
+        admin.role = 'user'
+        admin.save()
+        assert demoted.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Старый токен не должен сохранять снятые права.'
+
+    def test_06_deleted_user(self, admin_client, user):
+        api_client = claims_client(user)
+        response = admin_client.delete(f'{self.USERS_URL}{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert api_client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_07_revocation_survives_response_cache(self, admin):
+        from api.cache import get_cache
+
+        demoted = claims_client(admin)
+        admin.role = 'user'
+        admin.save()
+        response_cache = get_cache()
+        for number in range(400):
+            response_cache.set(f'filler:{number}', number)
+        response_cache.clear()
+        assert demoted.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Список отзыва не должен вытесняться и очищаться кэшем ответов.'
+
+    def test_08_queryset_update_revokes_claims(self, admin):
+        from django.contrib.auth import get_user_model
+
+        demoted = claims_client(admin)
+        get_user_model().objects.filter(pk=admin.pk).update(role='user')
+        assert demoted.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'update() прав пользователей тоже должен отзывать claims.'
+
+    def test_09_fails_closed(self, admin, monkeypatch, revocations):
+        from django.contrib.auth import get_user_model
+
+        demoted = claims_client(admin)
+        get_user_model().objects.filter(pk=admin.pk).update(role='user')
+
+        def unavailable(*args, **kwargs):
+            raise OSError('Кэш недоступен')
+
+        monkeypatch.setattr(revocations, 'get', unavailable)
+        assert demoted.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Без списка отзыва права должны проверяться по базе.'
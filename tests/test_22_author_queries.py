@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import create_single_comment, create_single_review
+
+
+def make_authors(django_user_model, count, start=0):
+    authors = []
+    for number in range(start, start + count):
+        user = django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        authors.append(client)
+    return authors
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22AuthorQueries:
+
+    @staticmethod
+    def count_queries(client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return len(queries), response.json()
+
+    def test_01_reviews_and_comments_list(self, client, admin_client,
+                                          django_user_model):
+        from tests.utils import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        review_id = None
+        for author in make_authors(django_user_model, 2):
+            review_id = create_single_review(
+                author, title_id, 'Текст', 5
+            ).json()['id']
+            create_single_comment(author, title_id, review_id, 'Текст')
+        comments_url = f'{reviews_url}{review_id}/comments/'
+
+        few_reviews, _ = self.count_queries(client, reviews_url)
+        few_comments, _ = self.count_queries(client, comments_url)
+
+        for author in make_authors(django_user_model, 6, start=2):
+            create_single_review(author, title_id, 'Текст', 5)
+            create_single_comment(author, title_id, review_id, 'Текст')
+        many_reviews, data = self.count_queries(client, reviews_url)
+        assert len(data['results']) == 8
+        assert {review['author'] for review in data['results']} == {
+            f'author{number}' for number in range(8)
+        }
+        many_comments, _ = self.count_queries(client, comments_url)
+
+        assert many_reviews == few_reviews, (
+            'Число запросов к базе для списка отзывов не должно зависеть '
+            'от числа авторов.'
+        )
+        assert many_comments == few_comments, (
+            'Число запросов к базе для списка комментариев не должно '
+            'зависеть от числа авторов.'
+        )
+
+    def test_02_permission_without_author_query(self, admin_client,
+                                                django_user_model):
+        from tests.utils import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        author, other = make_authors(django_user_model, 2)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        review_id = create_single_review(
+            author, titles[0]['id'], 'Текст', 5
+        ).json()['id']
+
+        response = other.patch(f'{url}{review_id}/', data={'text': 'Чужой'})
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        with CaptureQueriesContext(connection) as queries:
+            response = author.patch(
+                f'{url}{review_id}/', data={'text': 'Свой'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['author'] == 'author0'
+        user_queries = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "users_customuser"' in query['sql']
+        ]
+        assert len(user_queries) == 1, (
+            'Автор отзыва не должен загружаться отдельным запросом: '
+            'достаточно сравнить author_id.'
+        )
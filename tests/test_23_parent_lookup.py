@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+def parent_queries(queries, table):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ParentLookup:
+
+    def test_01_missing_title(self, admin_client):
+        response = admin_client.get('/api/v1/titles/999/reviews/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Список отзывов к несуществующему произведению должен '
+            'возвращать 404.'
+        )
+
+    def test_02_review_of_other_title(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        review_id = create_single_review(
+            admin_client, titles[0]['id'], 'Текст', 5
+        ).json()['id']
+        create_single_comment(
+            admin_client, titles[0]['id'], review_id, 'Текст'
+        )
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/{review_id}/comments/'
+
+        assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Комментарии к отзыву из чужого произведения должны '
+            'возвращать 404.'
+        )
+        response = admin_client.post(url, data={'text': 'Не туда'})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Комментарий к отзыву из чужого произведения не должен '
+            'создаваться.'
+        )
+
+    def test_03_one_parent_query(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        with CaptureQueriesContext(connection) as queries:
+            response = create_single_review(admin_client, title_id, 'Т', 5)
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(parent_queries(queries, 'reviews_title')) == 1, (
+            'Произведение должно загружаться одним запросом на запрос.'
+        )
+
+        review_id = response.json()['id']
+        with CaptureQueriesContext(connection) as queries:
+            response = create_single_comment(
+                admin_client, title_id, review_id, 'Текст'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(parent_queries(queries, 'reviews_review')) == 1, (
+            'Отзыв и его произведение должны проверяться одним запросом.'
+        )
+        assert not parent_queries(queries, 'reviews_title'), (
+            'Для комментария произведение отдельно не загружается.'
+        )
@@ -0,0 +1,153 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+def writes(queries, table='reviews_review'):
+    """Пишущие запросы к таблице."""
+    prefixes = tuple(
+        f'{statement} "{table}"'
+        for statement in ('INSERT INTO', 'UPDATE', 'DELETE FROM')
+    )
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith(prefixes)
+    ]
+
+
+def recounts(queries):
+    """Запросы, пересчитывающие рейтинг по всем отзывам произведения."""
+    return [
+        query['sql'] for query in queries.captured_queries
+        if any(
+            function in query['sql']
+            for function in ('SUM(', 'COUNT(', 'AVG(')
+        ) and '"reviews_review"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ReviewUpsert:
+
+    @staticmethod
+    def own_review_url(title_id):
+        return f'/api/v1/titles/{title_id}/reviews/me/'
+
+    @staticmethod
+    def assert_single_upsert(queries):
+        review_writes = writes(queries)
+        assert len(review_writes) == 1 and 'ON CONFLICT' in (
+            review_writes[0]
+        ), 'Отзыв должен записываться одним запросом INSERT ... ON CONFLICT.'
+        assert len(writes(queries, 'reviews_title')) == 1, (
+            'Рейтинг произведения должен сдвигаться одним UPDATE.'
+        )
+        assert recounts(queries) == [], (
+            'Рейтинг не должен пересчитываться по всем отзывам.'
+        )
+
+    def test_01_create_then_replace(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.own_review_url(title_id)
+        create_single_review(admin_client, title_id, 'Чужой', 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.put(url, data={'text': 'Мой', 'score': 4})
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'PUT-запрос к `{url}` без отзыва должен создавать его '
+            'и возвращать статус 201.'
+        )
+        self.assert_single_upsert(queries)
+        review = response.json()
+        assert review['author'] == 'TestUser'
+        assert Title.objects.get(pk=title_id).rating == 3
+
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.put(
+                url, data={'text': 'Передумал', 'score': 10}
+            )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Повторный PUT-запрос к `{url}` должен заменять отзыв '
+            'и возвращать статус 200.'
+        )
+        self.assert_single_upsert(queries)
+        assert response.json()['id'] == review['id']
+        assert response.json()['pub_date'] == review['pub_date']
+        assert Review.objects.filter(title=title_id).count() == 2
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.score_count, title.rating) == (
+            12, 2, 6
+        ), 'Рейтинг должен учитывать заменённую оценку.'
+
+    def test_02_duplicate_post(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Первый', 5)
+        response = admin_client.post(
+            f'/api/v1/titles/{title_id}/reviews/',
+            data={'text': 'Второй', 'score': 1}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_count, title.rating) == (1, 5), (
+            'Отклонённый повторный отзыв не должен менять рейтинг.'
+        )
+        assert Review.objects.get(title=title_id).text == 'Первый'
+
+    def test_03_cache_and_validation(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.own_review_url(title_id)
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        admin_client.put(url, data={'text': 'Было', 'score': 5})
+        assert client.get(reviews_url).json()['results'][0]['text'] == 'Было'
+
+        admin_client.put(url, data={'text': 'Стало', 'score': 5})
+        assert client.get(reviews_url).json()['results'][0]['text'] == (
+            'Стало'
+        ), 'Замена отзыва должна сбрасывать кэш списка отзывов.'
+
+        response = admin_client.put(url, data={'text': 'Мало', 'score': 11})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.put(url, data={'text': 'Аноним', 'score': 5})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        assert admin_client.get(url).status_code == (
+            HTTPStatus.METHOD_NOT_ALLOWED
+        )
+        response = admin_client.options(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'OPTIONS-запрос к `{url}` должен описывать маршрут.'
+        )
+        assert response['Allow'] == 'PUT, OPTIONS'
+        assert 'PUT' in response.json()['actions'], (
+            'OPTIONS должен описывать поля отзыва для PUT-запроса.'
+        )
+        response = admin_client.put(
+            '/api/v1/titles/999/reviews/me/', data={'text': 'Т', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_old_sqlite_fallback(self, admin_client, user_client,
+                                    monkeypatch):
+        monkeypatch.setattr(
+            connection.Database, 'sqlite_version_info', (3, 34, 1)
+        )
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = self.own_review_url(title_id)
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.put(url, data={'text': 'Мой', 'score': 4})
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any('RETURNING' in sql for sql in writes(queries)), (
+            'SQLite до 3.35 не поддерживает RETURNING.'
+        )
+        response = user_client.put(url, data={'text': 'Новый', 'score': 8})
+        assert response.status_code == HTTPStatus.OK
+        assert Review.objects.get(title=title_id).text == 'Новый'
+        assert Title.objects.get(pk=title_id).rating == 8
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.models import OutgoingEmail
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+
+
+def user_queries(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if '"users_customuser"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25SignupQueries:
+
+    def signup(self, client, username, email):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                URL_SIGNUP, data={'username': username, 'email': email}
+            )
+        return response, user_queries(queries)
+
+    def test_01_new_and_repeated_signup(self, client, django_user_model):
+        response, queries = self.signup(client, 'new_user', 'new@yamdb.fake')
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 2 and queries[1].startswith('INSERT'), (
+            'Регистрация нового пользователя должна проверять username '
+            'и email одним запросом и сохранять пользователя с кодом '
+            'одной записью.'
+        )
+        user = django_user_model.objects.get(username='new_user')
+        assert user.confirmation_code in OutgoingEmail.objects.get().body
+
+        response, queries = self.signup(client, 'new_user', 'new@yamdb.fake')
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 2 and queries[1].startswith('UPDATE'), (
+            'Повторная регистрация должна обновлять код одним запросом.'
+        )
+        code = django_user_model.objects.get(
+            username='new_user'
+        ).confirmation_code
+        assert code in OutgoingEmail.objects.latest('pk').body, (
+            'В письме должен быть новый код подтверждения, а не прежний.'
+        )
+
+    @pytest.mark.parametrize('username, email, fields', (
+        ('taken', 'free@yamdb.fake', {'username'}),
+        ('free', 'taken@yamdb.fake', {'email'}),
+        ('taken', 'other@yamdb.fake', {'username', 'email'}),
+    ))
+    def test_02_conflicts(self, client, django_user_model,
+                          username, email, fields):
+        django_user_model.objects.create_user(
+            username='taken', email='taken@yamdb.fake'
+        )
+        django_user_model.objects.create_user(
+            username='other', email='other@yamdb.fake'
+        )
+        response, queries = self.signup(client, username, email)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert set(response.json()) == fields
+        assert len(queries) == 1, (
+            'Конфликты username и email должны определяться одним запросом.'
+        )
+        assert not OutgoingEmail.objects.exists()